@@ -17,6 +17,7 @@ from routes.alert import alert_bp, init_alert_routes
 from routes.onprem import onprem_bp, init_onprem_routes
 from routes.rag import rag_bp, init_rag_routes
 from routes.chat import chat_bp, init_chat_routes
+from routes.servicenow import servicenow_bp, init_servicenow_routes
 
 
 
@@ -51,12 +52,14 @@ if __name__ == "__main__":
     init_alert_routes(alert_service, engineer, twilio_client)
     init_rag_routes(rag_service)
     init_chat_routes(chat_agent)
+    init_servicenow_routes(servicenow)
 
     app.register_blueprint(call_bp)
     app.register_blueprint(onprem_bp)
     app.register_blueprint(alert_bp)
     app.register_blueprint(rag_bp)
     app.register_blueprint(chat_bp)
+    app.register_blueprint(servicenow_bp)
     
     # 5. Start autonomous agent
     print("[4/5] Starting autonomous agent...")
@@ -67,13 +67,43 @@ SERVICENOW_TOOLS = [
     {
     "type": "function",
     "name": "list_open_tickets",
-    "description": "List all open ServiceNow tickets in the network queue. Returns ticket numbers, descriptions, priorities, and current states.",
+    "description": "List all open ServiceNow tickets in the network queue. Returns the total count plus ticket numbers, descriptions, priorities, and current states for the first tickets.",
     "parameters": {
         "type": "object",
         "properties": {},
         "required": []
     }
     },
+    {
+        "type": "function",
+        "name": "get_ticket_stats",
+        "description": "Count ServiceNow tickets in the network queue, optionally broken down by state, priority or category. Use this for 'how many' questions instead of listing tickets.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "group_by": {
+                    "type": "string",
+                    "description": "Field to break the counts down by",
+                    "enum": ["state", "priority", "category", "assigned_to"]
+                },
+                "priority": {
+                    "type": "string",
+                    "description": "Only count this priority: 1-Critical, 2-High, 3-Moderate, 4-Low, 5-Planning",
+                    "enum": ["1", "2", "3", "4", "5"]
+                },
+                "state": {
+                    "type": "string",
+                    "description": "Only count this state: 1-New, 2-In Progress, 3-On Hold, 6-Resolved, 7-Closed",
+                    "enum": ["1", "2", "3", "6", "7"]
+                },
+                "include_closed": {
+                    "type": "boolean",
+                    "description": "Also count resolved and closed tickets (default: open tickets only, unless a state is given)"
+                }
+            },
+            "required": []
+        }
+    },
     {
         "type": "function",
         "name": "close_servicenow_ticket",
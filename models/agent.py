@@ -1,4 +1,5 @@
 import asyncio
+import os
 
 class NetworkAgent:
     
@@ -9,7 +10,7 @@ class NetworkAgent:
         print(f"  rag_service: {rag_service is not None}", flush=True)
         self.servicenow_instance = servicenow_instance
         self.rag_service = rag_service
-        self.preferred_llm = "Claude"
+        self.preferred_llm = os.getenv("AGENT_LLM", "Claude")  # "Auto" routes across providers
         print(f"  ✓ Stored rag_service: {self.rag_service is not None}", flush=True)
         
     def set_preferred_llm(self, llm):
@@ -1,8 +1,10 @@
 """Chat Agent - interactive text chat with Claude"""
-import anthropic
+import asyncio
 import os
 import json
 from models.tool_router import ToolRouter
+from models.llm_factory import AbstractLLMServiceFactory
+from models.conversation_history import ConversationHistoryManager
 
 class ChatAgent:
     """Chat interface using Claude for network operations"""
@@ -15,8 +17,12 @@ class ChatAgent:
         # Create router
         self.router = ToolRouter(servicenow, onprem_bridge, rag_service)
         
-        # Claude client
-        self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        # Shared async Claude service (pooled clients, rate budget)
+        self.claude = AbstractLLMServiceFactory.get_llm_instance("Claude")
+        
+        # Tool loop: rounds per message, and how long any one tool may take
+        self.max_tool_rounds = int(os.getenv("CHAT_MAX_TOOL_ROUNDS", "5"))
+        self.tool_timeout = float(os.getenv("CHAT_TOOL_TIMEOUT", "30"))
         
         # System prompt
         self.system_prompt = """You are an AI Network Operations Assistant helping network engineers.
@@ -36,6 +42,89 @@ class ChatAgent:
         
         # Tool definitions
         self.tools = self._load_tools()
+        
+        # Prompt caching: tools + system prompt + earlier turns are a stable prefix
+        self.prompt_cache = os.getenv("CHAT_PROMPT_CACHE", "true").lower() == "true"
+        self.usage = {
+            "requests": 0,
+            "input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "output_tokens": 0
+        }
+        
+        # Keep resent history (mostly raw tool results) within a token budget
+        self.history = ConversationHistoryManager()
+    
+    def _request(self, messages):
+        """messages.create arguments, with cache breakpoints on the stable prefix"""
+        request = {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4096,
+            "system": self.system_prompt,
+            "messages": messages,
+            "tools": self.tools
+        }
+        if not self.prompt_cache:
+            return request
+        
+        # Breakpoint 1: tools and system prompt (tools come first in the cached prefix)
+        request["system"] = [{
+            "type": "text",
+            "text": self.system_prompt,
+            "cache_control": {"type": "ephemeral"}
+        }]
+        
+        # Breakpoint 2: the whole conversation so far, so the next turn reads it from cache.
+        # Copy the last message - history goes back to the client and must stay unmarked
+        if messages:
+            last = dict(messages[-1])
+            content = last["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            content = [dict(block) for block in content]
+            if content:
+                content[-1]["cache_control"] = {"type": "ephemeral"}
+            last["content"] = content
+            request["messages"] = messages[:-1] + [last]
+        
+        return request
+    
+    def _next_request(self, messages, rounds):
+        """Request for the next model call - once out of tool rounds, Claude must answer"""
+        request = self._request(messages)
+        if rounds >= self.max_tool_rounds:
+            print(f"⚠️  Tool round limit ({self.max_tool_rounds}) reached, asking for a final answer", flush=True)
+            request["tool_choice"] = {"type": "none"}
+        return request
+    
+    def _record_usage(self, response):
+        """Accumulate token usage, including prompt cache reads and writes"""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        self.usage["requests"] += 1
+        for field in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens", "output_tokens"):
+            self.usage[field] += getattr(usage, field, None) or 0
+        print(
+            f"📊 Claude usage: {usage.input_tokens} in, {getattr(usage, 'cache_read_input_tokens', 0) or 0} cached, "
+            f"{getattr(usage, 'cache_creation_input_tokens', 0) or 0} cache write, {usage.output_tokens} out",
+            flush=True
+        )
+    
+    def stats(self):
+        """Token usage totals and the share of prompt tokens served from cache"""
+        prompt_tokens = (
+            self.usage["input_tokens"]
+            + self.usage["cache_creation_input_tokens"]
+            + self.usage["cache_read_input_tokens"]
+        )
+        return {
+            "prompt_cache": self.prompt_cache,
+            **self.usage,
+            "history": self.history.stats(),
+            "cache_hit_ratio": round(self.usage["cache_read_input_tokens"] / prompt_tokens, 3) if prompt_tokens else None
+        }
     
     def _load_tools(self):
         """Load and convert tool definitions to Claude format"""
@@ -64,58 +153,118 @@ class ChatAgent:
             conversation_history = []
         
         # Build messages
-        messages = conversation_history + [{"role": "user", "content": message}]
+        messages = self.history.compact(conversation_history) + [{"role": "user", "content": message}]
         
         # Call Claude
-        response = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4096,
-            system=self.system_prompt,
-            messages=messages,
-            tools=self.tools
-        )
+        response = await self.claude.create_message(**self._request(messages))
+        self._record_usage(response)
         
         # Handle response
         return await self._handle_response(response, messages)
     
-    async def _handle_response(self, response, messages):
-        """Handle Claude's response and tool calls"""
-        # Check if tool use is needed
-        if response.stop_reason == "tool_use":
-            # Extract tool calls
-            tool_results = []
-            assistant_content = []
+    async def chat_stream(self, message, conversation_history=None):
+        """Process a chat message, yielding events as the answer is generated.
+
+        Events: {"type": "text", "text": delta}, {"type": "tool", "name": ...}
+        and finally {"type": "done", "message": ..., "conversation_history": ...}.
+        """
+        if conversation_history is None:
+            conversation_history = []
+        
+        messages = self.history.compact(conversation_history) + [{"role": "user", "content": message}]
+        
+        rounds = 0
+        text_response = ""
+        stream = self.claude.stream_messages(**self._request(messages))
+        while True:
+            try:
+                async for delta in stream:
+                    yield {"type": "text", "text": delta}
+            finally:
+                # Also runs when the client disconnects - stop the provider's generation
+                await stream.aclose()
+            text_response += stream.text
+            response = stream.final_message
+            self._record_usage(response)
+            if response.stop_reason != "tool_use":
+                break
             
-            for content_block in response.content:
-                if content_block.type == "tool_use":
-                    tool_name = content_block.name
-                    tool_input = content_block.input
-                    tool_use_id = content_block.id
-                    
-                    print(f"🔧 Claude calling: {tool_name}({tool_input})", flush=True)
-                    
-                    # Store tool use in assistant content (serializable format)
-                    assistant_content.append({
-                        "type": "tool_use",
-                        "id": tool_use_id,
-                        "name": tool_name,
-                        "input": tool_input
-                    })
-                    
-                    # Execute tool
-                    result = await self.router.route(tool_name, tool_input)
-                    
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": json.dumps(result)
-                    })
-                elif content_block.type == "text":
-                    # Include any text blocks too
-                    assistant_content.append({
-                        "type": "text",
-                        "text": content_block.text
-                    })
+            for block in response.content:
+                if block.type == "tool_use":
+                    yield {"type": "tool", "name": block.name}
+            
+            assistant_content, tool_results = await self._run_tool_calls(response.content)
+            messages.append({"role": "assistant", "content": assistant_content})
+            messages.append({"role": "user", "content": tool_results})
+            
+            rounds += 1
+            stream = self.claude.stream_messages(**self._next_request(messages, rounds))
+        
+        messages.append({
+            "role": "assistant",
+            "content": [{"type": "text", "text": block.text} for block in response.content if hasattr(block, 'text')]
+        })
+        
+        yield {"type": "done", "message": text_response, "conversation_history": messages}
+    
+    async def _run_tool(self, tool_name, tool_input):
+        """Execute one tool under the per-tool timeout - returns (content, is_error)"""
+        try:
+            result = await asyncio.wait_for(self.router.route(tool_name, tool_input), self.tool_timeout)
+            return json.dumps(result), False
+        except asyncio.TimeoutError:
+            print(f"❌ Tool {tool_name} timed out after {self.tool_timeout:g}s", flush=True)
+            return json.dumps({"error": f"{tool_name} timed out after {self.tool_timeout:g}s"}), True
+        except Exception as e:
+            print(f"❌ Tool {tool_name} failed: {e}", flush=True)
+            return json.dumps({"error": str(e)}), True
+    
+    async def _run_tool_calls(self, content_blocks):
+        """Execute the tool calls in a response concurrently - returns (assistant_content, tool_results)"""
+        assistant_content = []
+        tool_calls = []
+        
+        for content_block in content_blocks:
+            if content_block.type == "tool_use":
+                print(f"🔧 Claude calling: {content_block.name}({content_block.input})", flush=True)
+                
+                # Store tool use in assistant content (serializable format)
+                assistant_content.append({
+                    "type": "tool_use",
+                    "id": content_block.id,
+                    "name": content_block.name,
+                    "input": content_block.input
+                })
+                tool_calls.append(content_block)
+            elif content_block.type == "text":
+                # Include any text blocks too
+                assistant_content.append({
+                    "type": "text",
+                    "text": content_block.text
+                })
+        
+        # One round of latency however many tools Claude asked for
+        results = await asyncio.gather(*(self._run_tool(block.name, block.input) for block in tool_calls))
+        
+        tool_results = []
+        for block, (content, is_error) in zip(tool_calls, results):
+            tool_result = {
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": content
+            }
+            if is_error:
+                tool_result["is_error"] = True
+            tool_results.append(tool_result)
+        
+        return assistant_content, tool_results
+    
+    async def _handle_response(self, response, messages):
+        """Handle Claude's response, running tool rounds until it answers"""
+        rounds = 0
+        while response.stop_reason == "tool_use":
+            # Extract tool calls and execute them
+            assistant_content, tool_results = await self._run_tool_calls(response.content)
             
             # Add assistant message with tool use (serializable format)
             messages.append({
@@ -129,56 +278,29 @@ class ChatAgent:
                 "content": tool_results
             })
             
-            # Get final response
-            final_response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                system=self.system_prompt,
-                messages=messages,
-                tools=self.tools
-            )
-            
-            # Extract text response and convert to serializable format
-            text_response = ""
-            final_content = []
-            for block in final_response.content:
-                if hasattr(block, 'text'):
-                    text_response += block.text
-                    final_content.append({
-                        "type": "text",
-                        "text": block.text
-                    })
-            
-            # Add final assistant message
-            messages.append({
-                "role": "assistant",
-                "content": final_content
-            })
-            
-            return {
-                "message": text_response,
-                "conversation_history": messages
-            }
+            # Let Claude use the results - it may ask for more tools
+            rounds += 1
+            response = await self.claude.create_message(**self._next_request(messages, rounds))
+            self._record_usage(response)
         
-        else:
-            # No tool use, direct response
-            text_response = ""
-            serializable_content = []
-            
-            for block in response.content:
-                if hasattr(block, 'text'):
-                    text_response += block.text
-                    serializable_content.append({
-                        "type": "text",
-                        "text": block.text
-                    })
-            
-            messages.append({
-                "role": "assistant",
-                "content": serializable_content
-            })
-            
-            return {
-                "message": text_response,
-                "conversation_history": messages
-            }
\ No newline at end of file
+        # Extract text response and convert to serializable format
+        text_response = ""
+        serializable_content = []
+        
+        for block in response.content:
+            if hasattr(block, 'text'):
+                text_response += block.text
+                serializable_content.append({
+                    "type": "text",
+                    "text": block.text
+                })
+        
+        messages.append({
+            "role": "assistant",
+            "content": serializable_content
+        })
+        
+        return {
+            "message": text_response,
+            "conversation_history": messages
+        }
@@ -0,0 +1,118 @@
+"""Conversation History - keep chat history within a token budget"""
+import json
+import os
+import threading
+from models.token_counter import count_tokens, truncate_to_tokens
+
+
+class ConversationHistoryManager:
+    """Compacts Messages API history once it crosses a token budget.
+
+    History is handled in turns - a user message plus everything up to the
+    next user message - so a tool_use and its tool_result are always kept or
+    dropped together. Compaction first truncates tool results outside the
+    most recent turns, then drops the oldest turns, noting what they asked
+    about at the start of the first turn kept. It compacts down to
+    target_ratio of the budget so it doesn't re-run (and invalidate the
+    prompt cache) on every turn.
+    """
+
+    def __init__(self, token_budget=None, keep_turns=None, tool_result_tokens=None, target_ratio=None):
+        self.token_budget = token_budget or int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "8000"))
+        self.keep_turns = keep_turns or int(os.getenv("CHAT_HISTORY_KEEP_TURNS", "3"))
+        self.tool_result_tokens = tool_result_tokens or int(os.getenv("CHAT_TOOL_RESULT_TOKENS", "200"))
+        self.target_ratio = target_ratio or float(os.getenv("CHAT_HISTORY_TARGET_RATIO", "0.75"))
+        self._lock = threading.Lock()
+        self._counters = {"compactions": 0, "tool_results_truncated": 0, "turns_dropped": 0}
+
+    @staticmethod
+    def message_tokens(message):
+        content = message["content"]
+        return count_tokens(content if isinstance(content, str) else json.dumps(content, default=str))
+
+    def count(self, messages):
+        return sum(self.message_tokens(message) for message in messages)
+
+    @staticmethod
+    def _starts_turn(message):
+        """A user message that isn't just tool results"""
+        if message["role"] != "user":
+            return False
+        content = message["content"]
+        return isinstance(content, str) or any(block.get("type") != "tool_result" for block in content)
+
+    def _turns(self, messages):
+        turns = []
+        for message in messages:
+            if not turns or self._starts_turn(message):
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def _truncate_tool_results(self, turn):
+        """Copy of a turn with long tool results cut down"""
+        compacted = []
+        for message in turn:
+            if isinstance(message["content"], list):
+                content = []
+                for block in message["content"]:
+                    if block.get("type") == "tool_result" and isinstance(block.get("content"), str) \
+                            and count_tokens(block["content"]) > self.tool_result_tokens:
+                        block = {**block, "content": truncate_to_tokens(
+                            block["content"], self.tool_result_tokens, "\n[...tool result truncated]"
+                        )}
+                        self._counters["tool_results_truncated"] += 1
+                    content.append(block)
+                message = {**message, "content": content}
+            compacted.append(message)
+        return compacted
+
+    @staticmethod
+    def _question(turn):
+        content = turn[0]["content"]
+        if not isinstance(content, str):
+            content = " ".join(block.get("text", "") for block in content if block.get("type") == "text")
+        content = " ".join(content.split())
+        return content[:100] + ("..." if len(content) > 100 else "")
+
+    def _with_note(self, turn, dropped):
+        """Prefix the first kept turn with a note about the dropped ones"""
+        questions = "; ".join(self._question(t) for t in dropped if t[0]["role"] == "user")
+        note = f"[Earlier conversation ({len(dropped)} turns) omitted to save space. The user had asked: {questions}]"
+        first = turn[0]
+        content = first["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        return [{**first, "content": [{"type": "text", "text": note}] + list(content)}] + turn[1:]
+
+    def compact(self, messages):
+        """History within the token budget - returns a new list, the input is left untouched"""
+        total = self.count(messages)
+        if total <= self.token_budget:
+            return messages
+
+        target = int(self.token_budget * self.target_ratio)
+        turns = self._turns(messages)
+        recent = max(0, len(turns) - self.keep_turns)
+        with self._lock:
+            self._counters["compactions"] += 1
+            turns = [self._truncate_tool_results(turn) for turn in turns[:recent]] + turns[recent:]
+
+        # Drop the oldest turns (always keeping the latest) until under the target
+        sizes = [self.count(turn) for turn in turns]
+        dropped = []
+        while len(turns) > 1 and sum(sizes) > target:
+            dropped.append(turns.pop(0))
+            sizes.pop(0)
+        if dropped:
+            turns[0] = self._with_note(turns[0], dropped)
+            with self._lock:
+                self._counters["turns_dropped"] += len(dropped)
+
+        compacted = [message for turn in turns for message in turn]
+        print(f"✂️  Compacted chat history: {total} -> {self.count(compacted)} tokens "
+              f"({len(dropped)} turns dropped)", flush=True)
+        return compacted
+
+    def stats(self):
+        return {"token_budget": self.token_budget, "keep_turns": self.keep_turns, **self._counters}
@@ -0,0 +1,212 @@
+"""LLM Batch - submit many analyze prompts as one provider batch job"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+
+class AbstractBatchBackend(ABC):
+    """Runs a set of analyze prompts as a batch and maps the answers back by id.
+
+    Provider batch APIs trade latency (minutes, up to 24h) for lower cost and
+    no per-request rate limits, which suits backfills of hundreds of tickets.
+    """
+
+    _backends_registry = dict()
+    provider = None  # the LLMServices.PROVIDER whose client and models a backend needs
+
+    def __init_subclass__(cls, /, backend: str):
+        AbstractBatchBackend._backends_registry[backend] = cls
+
+    def __init__(self, llm_service):
+        self.llm_service = llm_service
+        self.poll_interval = float(os.getenv("LLM_BATCH_POLL_INTERVAL", "30"))
+        self.timeout = float(os.getenv("LLM_BATCH_TIMEOUT", str(24 * 3600)))
+
+    @abstractmethod
+    async def submit(self, prompts):
+        """Start a batch for {custom_id: prompt} - returns the batch id"""
+        pass
+
+    @abstractmethod
+    async def is_done(self, batch_id):
+        pass
+
+    @abstractmethod
+    async def results(self, batch_id):
+        """{custom_id: text} for the requests that succeeded"""
+        pass
+
+    async def cancel(self, batch_id):
+        pass
+
+    async def run(self, prompts):
+        """Submit, poll until the batch ends, and return {custom_id: text or None}"""
+        if not prompts:
+            return {}
+
+        batch_id = await self.submit(prompts)
+        print(f"📦 Submitted batch {batch_id} with {len(prompts)} prompts", flush=True)
+        started = time.monotonic()
+        try:
+            while not await self.is_done(batch_id):
+                if time.monotonic() - started > self.timeout:
+                    raise asyncio.TimeoutError(f"Batch {batch_id} did not finish in {self.timeout}s")
+                await asyncio.sleep(self.poll_interval)
+        except BaseException:
+            await self.cancel(batch_id)
+            raise
+
+        results = await self.results(batch_id)
+        print(f"📦 Batch {batch_id} finished: {len(results)}/{len(prompts)} succeeded "
+              f"in {time.monotonic() - started:.0f}s", flush=True)
+        return {custom_id: results.get(custom_id) for custom_id in prompts}
+
+    @classmethod
+    def get_backend(cls, backend: str, llm_service):
+        concrete_class = cls._backends_registry.get(backend)
+        if concrete_class is None:
+            raise ValueError(f"Unknown batch backend: {backend}")
+        service_provider = getattr(llm_service, "PROVIDER", None)
+        if concrete_class.provider and concrete_class.provider != service_provider:
+            # e.g. the anthropic backend with an OpenAI or routed service - no client or models for it
+            print(f"⚠️  Batch backend {backend} needs an {concrete_class.provider} service, "
+                  f"got {type(llm_service).__name__} - using local", flush=True)
+            concrete_class = cls._backends_registry["local"]
+        return concrete_class(llm_service)
+
+
+class AnthropicBatchBackend(AbstractBatchBackend, backend="anthropic"):
+    """Anthropic Message Batches API"""
+
+    provider = "anthropic"
+
+    async def submit(self, prompts):
+        batch = await self.llm_service.client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.llm_service.ANALYZE_MODEL,
+                    "max_tokens": getattr(self.llm_service, "ANALYZE_MAX_TOKENS", 2048),
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            } for custom_id, prompt in prompts.items()
+        ])
+        return batch.id
+
+    async def is_done(self, batch_id):
+        batch = await self.llm_service.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended"
+
+    async def results(self, batch_id):
+        results = {}
+        async for entry in await self.llm_service.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                print(f"✗ Batch request {entry.custom_id} {entry.result.type}", flush=True)
+        return results
+
+    async def cancel(self, batch_id):
+        try:
+            await self.llm_service.client.messages.batches.cancel(batch_id)
+        except Exception as e:
+            print(f"⚠️  Could not cancel batch {batch_id}: {e}", flush=True)
+
+
+class OpenAIBatchBackend(AbstractBatchBackend, backend="openai"):
+    """OpenAI Batch API over an uploaded JSONL file of chat completions"""
+
+    provider = "openai"
+    _FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+    async def submit(self, prompts):
+        lines = "\n".join(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.llm_service.ANALYZE_MODEL,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+        }) for custom_id, prompt in prompts.items())
+
+        client = self.llm_service.client
+        input_file = await client.files.create(
+            file=(f"analysis-{uuid.uuid4().hex}.jsonl", lines.encode()), purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        return batch.id
+
+    async def is_done(self, batch_id):
+        batch = await self.llm_service.client.batches.retrieve(batch_id)
+        return batch.status in self._FINAL_STATES
+
+    async def results(self, batch_id):
+        client = self.llm_service.client
+        batch = await client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            print(f"✗ Batch {batch_id} ended {batch.status} without output", flush=True)
+            return {}
+
+        content = await client.files.content(batch.output_file_id)
+        results = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            else:
+                print(f"✗ Batch request {entry.get('custom_id')} failed: {entry.get('error')}", flush=True)
+        return results
+
+    async def cancel(self, batch_id):
+        try:
+            await self.llm_service.client.batches.cancel(batch_id)
+        except Exception as e:
+            print(f"⚠️  Could not cancel batch {batch_id}: {e}", flush=True)
+
+
+class LocalBatchBackend(AbstractBatchBackend, backend="local"):
+    """Stand-in that runs the prompts through the service's analyze() - for tests and dev"""
+
+    def __init__(self, llm_service):
+        super().__init__(llm_service)
+        self.poll_interval = float(os.getenv("LLM_BATCH_POLL_INTERVAL", "1"))
+        self.concurrency = int(os.getenv("LLM_BATCH_LOCAL_CONCURRENCY", "4"))
+        self._batches = {}
+
+    async def submit(self, prompts):
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def analyze(prompt):
+            async with limit:
+                return await self.llm_service.analyze(prompt)
+
+        batch_id = f"local-{uuid.uuid4().hex[:8]}"
+        self._batches[batch_id] = {
+            custom_id: asyncio.create_task(analyze(prompt)) for custom_id, prompt in prompts.items()
+        }
+        return batch_id
+
+    async def is_done(self, batch_id):
+        return all(task.done() for task in self._batches[batch_id].values())
+
+    async def results(self, batch_id):
+        results = {}
+        for custom_id, task in self._batches.pop(batch_id).items():
+            if not task.cancelled() and task.exception() is None and task.result():
+                results[custom_id] = task.result()
+            else:
+                print(f"✗ Batch request {custom_id} failed: {None if task.cancelled() else task.exception()}", flush=True)
+        return results
+
+    async def cancel(self, batch_id):
+        for task in self._batches.pop(batch_id, {}).values():
+            task.cancel()
@@ -0,0 +1,223 @@
+"""LLM Response Cache - reuse analyses of identical or near-identical tickets"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class LLMResponseCache:
+    """Two-tier cache of LLM responses, persisted in SQLite.
+
+    - Exact tier: hash of the normalized input (case, whitespace and ticket
+      numbers ignored), so re-sent or duplicated tickets hit.
+    - Semantic tier: cosine similarity between input embeddings, so "switch
+      X port down" storms reuse one analysis. Only used when the caller
+      supplies an embedding.
+    Entries expire after ttl seconds; the least recently used are evicted
+    past max_entries. Methods block (SQLite, similarity scan) - async callers
+    should run them in a thread. The scan is one matrix product with numpy;
+    without it only the semantic_scan_limit most recently used entries are
+    compared.
+    """
+
+    _TICKET_NUMBER = re.compile(r'\b(INC|RITM|REQ|CHG|PRB)\d+\b', re.IGNORECASE)
+    _SYS_ID = re.compile(r'\b[0-9a-f]{32}\b', re.IGNORECASE)
+
+    def __init__(self, path, ttl=None, max_entries=None, similarity_threshold=None):
+        self.path = path
+        self.ttl = ttl or float(os.getenv("LLM_CACHE_TTL", "86400"))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX", "1000"))
+        self.similarity_threshold = similarity_threshold or float(os.getenv("LLM_CACHE_SIMILARITY", "0.95"))
+        self.semantic_scan_limit = int(os.getenv("LLM_CACHE_SEMANTIC_SCAN", "200"))
+        self._entries = OrderedDict()  # key -> {"llm", "response", "embedding", "created_at"}, LRU first
+        self._matrix = None  # (keys, stacked unit embeddings) for the numpy scan, rebuilt after changes
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, llm TEXT, response TEXT NOT NULL, embedding TEXT, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._load()
+
+    def _load(self):
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            rows = self._db.execute(
+                "SELECT key, llm, response, embedding, created_at FROM llm_cache "
+                "ORDER BY last_used DESC LIMIT ?", (self.max_entries,)
+            ).fetchall()
+            for key, llm, response, embedding, created_at in reversed(rows):
+                self._entries[key] = {
+                    "llm": llm,
+                    "response": response,
+                    "embedding": self._vector(json.loads(embedding)) if embedding else None,
+                    "created_at": created_at,
+                }
+            self._db.commit()
+        print(f"✓ Loaded {len(self._entries)} cached LLM responses from {self.path}", flush=True)
+
+    @classmethod
+    def normalize(cls, text):
+        """Canonical form of an input: ticket identifiers, case and whitespace don't matter"""
+        text = cls._TICKET_NUMBER.sub(lambda m: m.group(1).upper() + "#", text)
+        text = cls._SYS_ID.sub("SYS_ID", text)
+        return " ".join(text.lower().split())
+
+    def _key(self, llm, text):
+        return hashlib.sha256(f"{llm}\x00{self.normalize(text)}".encode()).hexdigest()
+
+    @staticmethod
+    def _unit(vector):
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else None
+
+    @staticmethod
+    def _vector(unit):
+        return numpy.asarray(unit, dtype=numpy.float32) if numpy is not None else unit
+
+    def _expired(self, entry, now):
+        return now - entry["created_at"] > self.ttl
+
+    def get(self, llm, text):
+        """Exact-tier lookup - cached response or None"""
+        key = self._key(llm, text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry, now):
+                if entry is not None:
+                    self._remove(key)
+                return None
+            self._touch(key, now)
+            self._counters["exact_hits"] += 1
+            return entry["response"]
+
+    def get_similar(self, llm, embedding):
+        """Semantic-tier lookup - response of the most similar cached input above the threshold"""
+        query = self._unit(embedding) if embedding else None
+        if query is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            if numpy is not None:
+                best_key, best_score = self._best_match_numpy(llm, query, now)
+            else:
+                best_key, best_score = self._best_match_scan(llm, query, now)
+
+            if best_key is None:
+                return None
+            self._touch(best_key, now)
+            self._counters["semantic_hits"] += 1
+            print(f"✓ Semantic cache hit (similarity {best_score:.3f})", flush=True)
+            return self._entries[best_key]["response"]
+
+    def _usable(self, entry, llm, now):
+        return entry["llm"] == llm and entry["embedding"] is not None and not self._expired(entry, now)
+
+    def _best_match_numpy(self, llm, query, now):
+        if self._matrix is None:
+            keys = [key for key, entry in self._entries.items() if entry["embedding"] is not None]
+            vectors = [self._entries[key]["embedding"] for key in keys]
+            dimensions = {len(vector) for vector in vectors}
+            if len(dimensions) > 1:  # embedding model changed - compare like with like
+                keep = len(query)
+                keys = [key for key, vector in zip(keys, vectors) if len(vector) == keep]
+                vectors = [vector for vector in vectors if len(vector) == keep]
+            self._matrix = (keys, numpy.stack(vectors) if vectors else None)
+
+        keys, matrix = self._matrix
+        if matrix is None or matrix.shape[1] != len(query):
+            return None, None
+        scores = matrix @ numpy.asarray(query, dtype=numpy.float32)
+        candidates = numpy.flatnonzero(scores >= self.similarity_threshold)
+        for index in candidates[numpy.argsort(-scores[candidates])]:  # best first
+            entry = self._entries.get(keys[index])
+            if entry is not None and self._usable(entry, llm, now):
+                return keys[index], float(scores[index])
+        return None, None
+
+    def _best_match_scan(self, llm, query, now):
+        """Pure-Python fallback - only the most recently used entries"""
+        best_key, best_score = None, self.similarity_threshold
+        for scanned, key in enumerate(reversed(self._entries)):
+            if scanned >= self.semantic_scan_limit:
+                break
+            entry = self._entries[key]
+            if not self._usable(entry, llm, now):
+                continue
+            score = sum(a * b for a, b in zip(query, entry["embedding"]))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def record_miss(self):
+        with self._lock:
+            self._counters["misses"] += 1
+
+    def put(self, llm, text, response, embedding=None):
+        """Cache a response; the embedding (if any) makes it reachable by similar inputs"""
+        if not response:
+            return
+        key = self._key(llm, text)
+        unit = self._unit(embedding) if embedding else None
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                "llm": llm, "response": response, "created_at": now,
+                "embedding": self._vector(unit) if unit else None
+            }
+            self._matrix = None
+            self._entries.move_to_end(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm, response, embedding, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, llm, response, json.dumps(unit) if unit else None, now, now)
+            )
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._matrix = None
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (oldest,))
+                self._counters["evictions"] += 1
+            self._db.commit()
+            self._counters["stores"] += 1
+
+    def _touch(self, key, now):
+        self._entries.move_to_end(key)
+        self._db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        self._matrix = None
+        self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self._db.commit()
+
+    def stats(self):
+        hits = self._counters["exact_hits"] + self._counters["semantic_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            **self._counters
+        }
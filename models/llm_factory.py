@@ -1,33 +1,64 @@
+import threading
 from abc import ABC, abstractmethod
 from models.llm_services import OpenAiService, ClaudeService
+from models.llm_router import RoutingLLMService
 
 class AbstractLLMServiceFactory(ABC):
 
     _factories_registry = dict()
 
+    # One shared service (and connection pool) per (llm, options)
+    _instances = dict()
+    _instances_lock = threading.Lock()
+
     def __init_subclass__(cls, /, llm: str):
         AbstractLLMServiceFactory._factories_registry[llm] = cls
     
     @abstractmethod
-    def create_llm_service(self, llm):
+    def create_llm_service(self, llm, **options):
         pass
 
     @classmethod
-    def get_llm_instance(cls, llm: str):
-        llm = llm
+    def stats(cls):
+        """Stats of cached services that keep any (e.g. the router)"""
+        return {
+            llm: instance.stats()
+            for (llm, options), instance in list(cls._instances.items())
+            if hasattr(instance, 'stats') and not options
+        }
+
+    @classmethod
+    def get_llm_instance(cls, llm: str, **options):
+        """Cached service for this LLM type - options (timeout, max_connections, ...) key separate instances"""
+        key = (llm, tuple(sorted(options.items())))
+        instance = cls._instances.get(key)
+        if instance is not None:
+            return instance
+
         concrete_class = cls._factories_registry.get(llm)
-        if concrete_class:
-            factory_instance = concrete_class()
-            return factory_instance.create_llm_service(llm)
-        return None
+        if concrete_class is None:
+            return None
+
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = concrete_class().create_llm_service(llm, **options)
+                cls._instances[key] = instance
+        return instance
     
 class OPENAIFactory(AbstractLLMServiceFactory, llm = 'OPENAI'):
 
-    def create_llm_service(self, llm):
-        return OpenAiService()
+    def create_llm_service(self, llm, **options):
+        return OpenAiService(**options)
     
 class ClaudeFactory(AbstractLLMServiceFactory, llm= "Claude"):
     
-    def create_llm_service(self, llm):
-        return ClaudeService()
+    def create_llm_service(self, llm, **options):
+        return ClaudeService(**options)
+
+class RoutingFactory(AbstractLLMServiceFactory, llm= "Auto"):
 
+    def create_llm_service(self, llm, **options):
+        # providers/hedge_after configure the router; other options go to the provider services,
+        # which share the factory's cached instances (and their connection pools)
+        return RoutingLLMService(AbstractLLMServiceFactory.get_llm_instance, **options)
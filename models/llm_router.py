@@ -0,0 +1,178 @@
+"""LLM Router - send each request to the fastest healthy provider, hedging slow ones"""
+import asyncio
+import os
+import time
+from collections import deque
+from models.metrics import summarize
+
+
+class ProviderHealth:
+    """Rolling error samples for one provider, and latency samples per operation.
+
+    Latencies are kept per operation (analyze, ask) because long analyses
+    would otherwise skew the ranking for short interactive calls.
+    """
+
+    def __init__(self, name, window=None, error_threshold=None, cooldown=None):
+        self.name = name
+        self.window = window or int(os.getenv("LLM_ROUTER_WINDOW", "100"))
+        self.error_threshold = error_threshold or float(os.getenv("LLM_ROUTER_ERROR_THRESHOLD", "0.5"))
+        self.cooldown = cooldown or float(os.getenv("LLM_ROUTER_COOLDOWN", "60"))
+        self._latencies = {}  # operation -> deque of seconds
+        self._outcomes = deque(maxlen=self.window)
+        self.cooldown_until = 0.0
+        self.requests = 0
+
+    def _window(self, operation):
+        return self._latencies.setdefault(operation, deque(maxlen=self.window))
+
+    def record(self, operation, latency, ok):
+        self.requests += 1
+        self._outcomes.append(ok)
+        if ok:
+            self._window(operation).append(latency)
+        elif len(self._outcomes) >= 5 and self.error_rate >= self.error_threshold:
+            # Mostly failing - stop routing to it for a while
+            self.cooldown_until = time.monotonic() + self.cooldown
+            self._outcomes.clear()
+            print(f"⚠️  LLM provider {self.name} unhealthy, cooling down {self.cooldown:.0f}s", flush=True)
+
+    def record_cancelled(self, operation, latency):
+        """A call cancelled after losing a hedge race was at least this slow"""
+        self._window(operation).append(latency)
+
+    @property
+    def error_rate(self):
+        return sum(1 for ok in self._outcomes if not ok) / len(self._outcomes) if self._outcomes else 0.0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.cooldown_until
+
+    def latency(self, operation):
+        return summarize(self._latencies.get(operation, ()))
+
+    def stats(self):
+        return {
+            "healthy": self.healthy,
+            "requests": self.requests,
+            "error_rate": round(self.error_rate, 3),
+            "latency": {operation: summarize(values) for operation, values in self._latencies.items()},
+        }
+
+
+class RoutingLLMService:
+    """LLM service that routes across providers registered with the factory.
+
+    Each call goes to the healthy provider with the lowest rolling p50; new
+    providers are tried first so every one gets samples. If the chosen
+    provider hasn't answered after the hedge delay, the same request is sent
+    to the runner-up and whichever answers first wins (the other is
+    cancelled). The hedge delay is LLM_HEDGE_AFTER seconds, or the primary's
+    p95 when set to "auto"; 0 disables hedging. Failed calls fail over to the
+    remaining providers. Any other options (timeout, max_connections, ...)
+    are passed on to the provider services.
+    """
+
+    def __init__(self, get_service, providers=None, hedge_after=None, **service_options):
+        self._get_service = get_service  # (llm name, **options) -> service instance
+        self.service_options = service_options
+        providers = providers or os.getenv("LLM_ROUTER_PROVIDERS", "Claude,OPENAI")
+        if isinstance(providers, str):
+            providers = providers.split(",")
+        self.providers = [name.strip() for name in providers if name.strip()]
+        self.hedge_after = hedge_after if hedge_after is not None else os.getenv("LLM_HEDGE_AFTER", "auto")
+        self.health = {name: ProviderHealth(name) for name in self.providers}
+        self._counters = {"hedged": 0, "hedge_wins": 0, "failovers": 0}
+
+    def _service(self, name):
+        return self._get_service(name, **self.service_options)
+
+    def _ranked(self, operation):
+        """Providers best first for an operation: healthy before cooling down, then unsampled, then by p50"""
+        def key(name):
+            health = self.health[name]
+            latency = health.latency(operation)
+            return (not health.healthy, latency["count"] > 0, latency.get("p50", 0.0))
+        return sorted(self.providers, key=key)
+
+    def _hedge_delay(self, name, operation):
+        if str(self.hedge_after).lower() == "auto":
+            latency = self.health[name].latency(operation)
+            return latency["p95"] if latency["count"] >= 20 else None
+        delay = float(self.hedge_after)
+        return delay if delay > 0 else None
+
+    async def _timed(self, name, method, content, kwargs):
+        started = time.monotonic()
+        try:
+            result = await getattr(self._service(name), method)(content, **kwargs)
+        except asyncio.CancelledError:
+            # Lost a hedge race - not an error, but keep its slowness in the ranking
+            self.health[name].record_cancelled(method, time.monotonic() - started)
+            raise
+        except Exception:
+            self.health[name].record(method, time.monotonic() - started, ok=False)
+            raise
+        self.health[name].record(method, time.monotonic() - started, ok=True)
+        return result
+
+    async def _route(self, method, content, **kwargs):
+        remaining = self._ranked(method)
+        primary = remaining.pop(0)
+        tasks = {asyncio.create_task(self._timed(primary, method, content, kwargs)): primary}
+        hedge, last_error = None, None
+
+        try:
+            delay = self._hedge_delay(primary, method)
+            if delay is not None and remaining:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    hedge = remaining.pop(0)
+                    self._counters["hedged"] += 1
+                    print(f"↷ {primary} slower than {delay:.1f}s, hedging with {hedge}", flush=True)
+                    tasks[asyncio.create_task(self._timed(hedge, method, content, kwargs))] = hedge
+
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks.pop(task)
+                    if task.exception() is None:
+                        if name == hedge:
+                            self._counters["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+                    print(f"✗ LLM provider {name} failed: {last_error}", flush=True)
+
+                # Everything in flight failed - fail over to the next provider
+                if not tasks and remaining:
+                    self._counters["failovers"] += 1
+                    backup = remaining.pop(0)
+                    tasks[asyncio.create_task(self._timed(backup, method, content, kwargs))] = backup
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        raise last_error
+
+    async def analyze(self, content, model=None):
+        """Analyze with the fastest healthy provider (model may be a tier alias like "small")"""
+        return await self._route("analyze", content, model=model)
+
+    async def ask(self, content, model=None):
+        """Ask the fastest healthy provider"""
+        return await self._route("ask", content, model=model)
+
+    def astream(self, content, **kwargs):
+        """Stream from the provider fastest at interactive asks (streams aren't hedged)"""
+        return self._service(self._ranked("ask")[0]).astream(content, **kwargs)
+
+    def stats(self):
+        return {
+            "providers": {name: health.stats() for name, health in self.health.items()},
+            "ranking": {operation: self._ranked(operation) for operation in ("analyze", "ask")},
+            "hedge_after": self.hedge_after,
+            **self._counters,
+        }
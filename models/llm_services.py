@@ -1,32 +1,373 @@
-from abc import ABC
-from openai import OpenAI
-import anthropic, os
+from abc import ABC, abstractmethod
+from openai import AsyncOpenAI, OpenAI
+from models.token_counter import count_tokens
+import anthropic, openai, asyncio, importlib, json, os, threading, time, weakref
+
+class LLMStream:
+    """Text deltas from a streaming completion, as they arrive.
+
+    Iterate it (`async for delta in stream`) to forward tokens incrementally,
+    or `await stream.collect()` for the whole text. Either way the full text,
+    time to first token and the provider's final message (stop reason, usage,
+    tool calls) are available once the stream is exhausted.
+    """
+
+    def __init__(self, source):
+        self._deltas = source(self)  # async generator of str; may set final_message
+        self._iterator = None
+        self._chunks = []
+        self.final_message = None
+        self.started_at = time.monotonic()
+        self.first_token_at = None
+
+    def __aiter__(self):
+        self._iterator = self._iterate()
+        return self._iterator
+
+    async def _iterate(self):
+        async for delta in self._deltas:
+            if not delta:
+                continue
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self._chunks.append(delta)
+            yield delta
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    @property
+    def time_to_first_token(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    async def collect(self):
+        """Consume the rest of the stream and return the full text"""
+        async for _ in self:
+            pass
+        return self.text
+
+    async def aclose(self):
+        """Stop early - closes the underlying HTTP stream"""
+        if self._iterator is not None:
+            await self._iterator.aclose()
+        await self._deltas.aclose()
+
+class TokenRateGovernor:
+    """Process-wide requests/min and tokens/min budget per provider and model.
+
+    Every caller (ticket analysis, chat, voice tools) draws from the same
+    token buckets before hitting a provider, so a ticket storm queues here
+    instead of tripping 429s for everyone. INTERACTIVE callers go first:
+    BACKGROUND work waits while interactive requests are queued and may not
+    draw a bucket below LLM_RATE_INTERACTIVE_RESERVE of its capacity.
+    Limits come from LLM_RPM_<PROVIDER> / LLM_TPM_<PROVIDER> and default to
+    0 (unlimited) - set them to the account's tier. A 429 still pauses the
+    model's callers either way.
+    """
+
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
 
-class LLMServices(ABC):
     def __init__(self):
+        self.reserve = float(os.getenv("LLM_RATE_INTERACTIVE_RESERVE", "0.2"))
+        self._buckets = {}  # (provider, model) -> bucket state
+        self._lock = threading.Lock()  # buckets are shared by every event loop in the process
+
+    def _limits(self, provider):
+        return (
+            float(os.getenv(f"LLM_RPM_{provider.upper()}", "0")),
+            float(os.getenv(f"LLM_TPM_{provider.upper()}", "0"))
+        )
+
+    def _bucket(self, provider, model):
+        key = (provider, model)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rpm, tpm = self._limits(provider)
+            bucket = self._buckets[key] = {
+                "rpm": rpm, "tpm": tpm, "requests": rpm, "tokens": tpm,
+                "updated": time.monotonic(), "paused_until": 0.0,
+                "waiting": {self.INTERACTIVE: 0, self.BACKGROUND: 0},
+                "stats": {
+                    "requests": 0, "tokens": 0, "throttled": 0, "waited_seconds": 0.0, "rate_limited": 0,
+                    "by_priority": {self.INTERACTIVE: 0, self.BACKGROUND: 0}
+                }
+            }
+        return bucket
+
+    @staticmethod
+    def _refill(bucket, now):
+        elapsed = now - bucket["updated"]
+        bucket["updated"] = now
+        bucket["requests"] = min(bucket["rpm"], bucket["requests"] + elapsed * bucket["rpm"] / 60)
+        bucket["tokens"] = min(bucket["tpm"], bucket["tokens"] + elapsed * bucket["tpm"] / 60)
+
+    def _try_take(self, bucket, tokens, priority):
+        """Take one request and tokens if the budget allows - returns (seconds to wait, tokens taken)"""
+        now = time.monotonic()
+        self._refill(bucket, now)
+        if now < bucket["paused_until"]:
+            return bucket["paused_until"] - now, 0
+        if priority == self.BACKGROUND and bucket["waiting"][self.INTERACTIVE]:
+            return 0.1, 0
+
+        floor = self.reserve if priority == self.BACKGROUND else 0.0
+        if bucket["tpm"]:
+            tokens = min(tokens, bucket["tpm"] * (1 - floor))  # never wait for more than the bucket holds
+        wait = 0.0
+        if bucket["rpm"]:
+            wait = max(wait, (1 + floor * bucket["rpm"] - bucket["requests"]) * 60 / bucket["rpm"])
+        if bucket["tpm"]:
+            wait = max(wait, (tokens + floor * bucket["tpm"] - bucket["tokens"]) * 60 / bucket["tpm"])
+        if wait > 0:
+            return wait, 0
+
+        bucket["requests"] -= 1 if bucket["rpm"] else 0
+        bucket["tokens"] -= tokens if bucket["tpm"] else 0
+        return 0.0, tokens
+
+    @staticmethod
+    def estimate(request):
+        """Tokens a Messages/Chat Completions request may use: prompt plus max_tokens"""
+        prompt = {key: request.get(key) for key in ("system", "messages", "tools") if request.get(key)}
+        return count_tokens(json.dumps(prompt, default=str)) + (request.get("max_tokens") or 0)
+
+    async def acquire(self, provider, model, tokens, priority=INTERACTIVE):
+        """Wait until the provider/model budget has room for a request of ~tokens - returns tokens taken"""
+        with self._lock:
+            bucket = self._bucket(provider, model)
+            bucket["waiting"][priority] += 1
+        started = time.monotonic()
+        try:
+            while True:
+                with self._lock:
+                    wait, taken = self._try_take(bucket, tokens, priority)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            with self._lock:
+                bucket["waiting"][priority] -= 1
+
+        waited = time.monotonic() - started
+        with self._lock:
+            stats = bucket["stats"]
+            stats["requests"] += 1
+            stats["tokens"] += taken
+            stats["by_priority"][priority] += 1
+            if waited > 0.05:
+                stats["throttled"] += 1
+                stats["waited_seconds"] += waited
+        if waited > 1:
+            print(f"⏳ {priority} {provider}/{model} request waited {waited:.1f}s for rate budget", flush=True)
+        return taken
+
+    def settle(self, provider, model, taken, used):
+        """Correct the bucket once the provider reports actual usage - taken is what acquire() returned"""
+        if used is None:
+            return
+        with self._lock:
+            bucket = self._bucket(provider, model)
+            if bucket["tpm"]:
+                bucket["tokens"] = min(bucket["tpm"], bucket["tokens"] + taken - used)
+            bucket["stats"]["tokens"] += used - taken
+
+    def pause(self, provider, model, seconds):
+        """Provider said 429 - hold every caller of this model for a while"""
+        with self._lock:
+            bucket = self._bucket(provider, model)
+            bucket["paused_until"] = max(bucket["paused_until"], time.monotonic() + seconds)
+            bucket["stats"]["rate_limited"] += 1
+        print(f"⚠️  {provider}/{model} rate limited, pausing {seconds:.0f}s", flush=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                f"{provider}/{model}": {
+                    "rpm": bucket["rpm"],
+                    "tpm": bucket["tpm"],
+                    "available_requests": round(bucket["requests"], 1),
+                    "available_tokens": round(bucket["tokens"]),
+                    "waiting": dict(bucket["waiting"]),
+                    **{key: (round(value, 1) if isinstance(value, float) else value)
+                       for key, value in bucket["stats"].items() if key != "by_priority"},
+                    "by_priority": dict(bucket["stats"]["by_priority"])
+                } for (provider, model), bucket in self._buckets.items()
+            }
+
+RATE_GOVERNOR = TokenRateGovernor()
+
+class LLMServices(ABC):
+    """Base for LLM services - instances are long-lived and shared across threads.
+
+    Calls go through async SDK clients over keep-alive connection pools, so
+    they never block the event loop. An async pool belongs to the loop that
+    created it, and the app runs several loops (agent thread, chat loop,
+    voice monitors), so each loop gets its own client. Short-lived loops must
+    await close_loop_clients() before they end - a client holds its loop
+    alive, so nothing frees it otherwise. Pool size and timeouts come from
+    the LLM_* environment variables unless overridden per instance.
+    """
+
+    _live = weakref.WeakSet()  # every service instance, for close_loop_clients()
+
+    def __init__(self, **options):
+        self.options = options
+        self.call_timeout = self._option("call_timeout", "LLM_CALL_TIMEOUT", 300.0)
+        self._clients = {}  # event loop -> async SDK client
+        self._clients_lock = threading.Lock()
+        LLMServices._live.add(self)
+
+    def _option(self, name, env, default):
+        value = self.options.get(name)
+        return value if value is not None else type(default)(os.getenv(env, default))
+
+    def _client_options(self, sdk):
+        """Pooled http_client, timeout and retry arguments for an async SDK client constructor"""
+        # Newer SDKs are built on httpx2 and reject httpx objects (and vice versa)
+        http = importlib.import_module(sdk.DefaultAsyncHttpxClient.__bases__[0].__module__.split(".")[0])
+        limits = http.Limits(
+            max_connections=self._option("max_connections", "LLM_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=self._option("max_keepalive", "LLM_MAX_KEEPALIVE", 10),
+            keepalive_expiry=self._option("keepalive_expiry", "LLM_KEEPALIVE_EXPIRY", 60.0)
+        )
+        return {
+            "http_client": sdk.DefaultAsyncHttpxClient(limits=limits),
+            "timeout": sdk.Timeout(
+                self._option("timeout", "LLM_TIMEOUT", 120.0),
+                connect=self._option("connect_timeout", "LLM_CONNECT_TIMEOUT", 10.0)
+            ),
+            "max_retries": self._option("max_retries", "LLM_MAX_RETRIES", 2)
+        }
+
+    @abstractmethod
+    def _create_client(self):
         pass
 
+    @property
+    def client(self):
+        """Async SDK client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            client = self._clients.get(loop)
+            if client is None:
+                # Backstop for loops that ended without close_loop_clients()
+                for closed in [other for other in self._clients if other.is_closed()]:
+                    del self._clients[closed]
+                client = self._create_client()
+                self._clients[loop] = client
+        return client
+
+    async def aclose_client(self):
+        """Close the running loop's client and its pooled connections"""
+        with self._clients_lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    PROVIDER = None
+    MODELS = {}  # tier aliases ("small") -> provider model names
+    RATE_LIMIT_ERRORS = (openai.RateLimitError, anthropic.RateLimitError)
+
+    def _model(self, model, default):
+        """Resolve a model argument - None, a tier alias or a provider model name"""
+        return default if model is None else self.MODELS.get(model, model)
+
+    @staticmethod
+    def _usage_tokens(response):
+        """Tokens the provider billed for a response, if it says"""
+        return None
+
+    async def _acquire(self, request, priority):
+        """Wait for rate budget - returns the tokens taken, to settle later"""
+        return await RATE_GOVERNOR.acquire(
+            self.PROVIDER, request.get("model"), RATE_GOVERNOR.estimate(request), priority
+        )
+
+    def _rate_limited(self, request, error):
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            seconds = float(retry_after)
+        except (TypeError, ValueError):
+            seconds = 10.0
+        RATE_GOVERNOR.pause(self.PROVIDER, request.get("model"), seconds)
+
+    async def _call(self, create, priority=TokenRateGovernor.INTERACTIVE, **request):
+        """Run create(**request) within the shared rate budget and an overall deadline (covers SDK retries)"""
+        reserved = await self._acquire(request, priority)
+        try:
+            response = await asyncio.wait_for(create(**request), self.call_timeout)
+        except self.RATE_LIMIT_ERRORS as e:
+            self._rate_limited(request, e)
+            raise
+        RATE_GOVERNOR.settle(self.PROVIDER, request.get("model"), reserved, self._usage_tokens(response))
+        return response
+
+    @staticmethod
+    async def _before(deadline, items):
+        """Items of an async iterable, raising TimeoutError once the monotonic deadline passes.
+        Each step gets its own wait_for since stream consumers may pull deltas from different tasks."""
+        iterator = aiter(items)
+        while True:
+            try:
+                item = await asyncio.wait_for(anext(iterator), deadline - time.monotonic())
+            except StopAsyncIteration:
+                return
+            yield item
+
+async def close_loop_clients():
+    """Close every service's client for the running loop - await before a short-lived loop ends"""
+    for service in list(LLMServices._live):
+        try:
+            await service.aclose_client()
+        except Exception as e:
+            print(f"⚠️  Could not close {type(service).__name__} client: {e}", flush=True)
+
 class OpenAiService(LLMServices):
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.openai_webhook = OpenAI(webhook_secret=os.getenv("OPENAI_WEBHOOK_SECRET")) 
+    PROVIDER = "openai"
+    ANALYZE_MODEL = "gpt-4o"
+    MODELS = {"small": os.getenv("OPENAI_SMALL_MODEL", "gpt-4o-mini")}
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._openai_webhook = None
+
+    def _create_client(self):
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), **self._client_options(openai))
 
-    async def analyze(self, content):
+    @property
+    def openai_webhook(self):
+        """Webhook-verification client, only built if something needs it"""
+        if self._openai_webhook is None:
+            self._openai_webhook = OpenAI(webhook_secret=os.getenv("OPENAI_WEBHOOK_SECRET"))
+        return self._openai_webhook
+
+    @staticmethod
+    def _usage_tokens(response):
+        usage = getattr(response, "usage", None)
+        return usage.total_tokens if usage else None
+
+    async def analyze(self, content, model=None):
         """Analyze with OpenAI"""
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
+        response = await self._call(
+            self.client.chat.completions.create,
+            TokenRateGovernor.BACKGROUND,
+            model=self._model(model, self.ANALYZE_MODEL),
             messages=[{
                 "role": "user",
                 "content": content
             }]
         )
         return response.choices[0].message.content
-    
-    
-    async def ask(self, content):
+
+
+    async def ask(self, content, model=None):
         """Ask OpenAI a question"""
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
+        response = await self._call(
+            self.client.chat.completions.create,
+            model=self._model(model, "gpt-4o"),
             messages=[{
                 "role": "user",
                 "content": content
@@ -34,26 +375,81 @@ class OpenAiService(LLMServices):
         )
         return response.choices[0].message.content
 
+    def astream(self, content, max_tokens=None):
+        """Stream an answer from OpenAI"""
+        return LLMStream(lambda stream: self._stream_chat(
+            stream,
+            model="gpt-4o",
+            max_tokens=max_tokens,
+            messages=[{
+                "role": "user",
+                "content": content
+            }]
+        ))
+
+    async def _stream_chat(self, stream, **request):
+        request = {key: value for key, value in request.items() if value is not None}
+        reserved = await self._acquire(request, TokenRateGovernor.INTERACTIVE)
+        deadline = time.monotonic() + self.call_timeout  # the whole stream, not just opening it
+        try:
+            chunks = await asyncio.wait_for(
+                self.client.chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, **request
+                ),
+                self.call_timeout
+            )
+        except self.RATE_LIMIT_ERRORS as e:
+            self._rate_limited(request, e)
+            raise
+        used = None
+        try:
+            async for chunk in self._before(deadline, chunks):
+                if chunk.usage is not None:
+                    used = self._usage_tokens(chunk)  # extra final chunk, no choices
+                if chunk.choices:
+                    stream.final_message = chunk  # last one carries finish_reason
+                    if chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        finally:
+            await chunks.close()
+        RATE_GOVERNOR.settle(self.PROVIDER, request.get("model"), reserved, used)
+
 class ClaudeService(LLMServices):
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    PROVIDER = "anthropic"
+    ANALYZE_MODEL = "claude-sonnet-4-5-20250929"
+    MODELS = {"small": os.getenv("CLAUDE_SMALL_MODEL", "claude-haiku-4-5-20251001")}
+    ANALYZE_MAX_TOKENS = 2048
+
+    def _create_client(self):
+        return anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), **self._client_options(anthropic))
 
-    async def analyze(self, content):
+    @staticmethod
+    def _usage_tokens(response):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        # Cache reads don't count against the input token limit
+        return usage.input_tokens + (getattr(usage, "cache_creation_input_tokens", 0) or 0) + usage.output_tokens
+
+    async def analyze(self, content, model=None):
         """Analyze with Claude"""
-        message = self.client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2048,
+        message = await self._call(
+            self.client.messages.create,
+            TokenRateGovernor.BACKGROUND,
+            model=self._model(model, self.ANALYZE_MODEL),
+            max_tokens=self.ANALYZE_MAX_TOKENS,
             messages=[{
                 "role": "user",
                 "content": content
             }]
         )
         return message.content[0].text
-    
-    async def ask(self, content):
+
+    async def ask(self, content, model=None):
         """Ask Claude a question"""
-        message = self.client.messages.create(
-            model="claude-sonnet-4-5-20250929",
+        message = await self._call(
+            self.client.messages.create,
+            model=self._model(model, "claude-sonnet-4-5-20250929"),
             max_tokens=1024,
             messages=[{
                 "role": "user",
@@ -61,4 +457,42 @@ class ClaudeService(LLMServices):
             }]
         )
         return message.content[0].text
-        
+
+    def astream(self, content, max_tokens=1024):
+        """Stream an answer from Claude"""
+        return self.stream_messages(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=max_tokens,
+            messages=[{
+                "role": "user",
+                "content": content
+            }]
+        )
+
+    async def create_message(self, priority=TokenRateGovernor.INTERACTIVE, **request):
+        """Send any Messages API request (system prompt, tools, history) and return the message"""
+        return await self._call(self.client.messages.create, priority, **request)
+
+    def stream_messages(self, **request):
+        """Stream any Messages API request (system prompt, tools, history) as an LLMStream"""
+        return LLMStream(lambda stream: self._stream_messages(stream, **request))
+
+    async def _stream_messages(self, stream, **request):
+        reserved = await self._acquire(request, TokenRateGovernor.INTERACTIVE)
+        deltas = self._message_deltas(stream, request)
+        try:
+            # Opening, every delta and the final message all count against call_timeout
+            async for text in self._before(time.monotonic() + self.call_timeout, deltas):
+                yield text
+        except self.RATE_LIMIT_ERRORS as e:
+            self._rate_limited(request, e)
+            raise
+        finally:
+            await deltas.aclose()
+        RATE_GOVERNOR.settle(self.PROVIDER, request.get("model"), reserved, self._usage_tokens(stream.final_message))
+
+    async def _message_deltas(self, stream, request):
+        async with self.client.messages.stream(**request) as response:
+            async for text in response.text_stream:
+                yield text
+            stream.final_message = await response.get_final_message()
@@ -0,0 +1,227 @@
+"""MCP Session Pool - long-lived, health-checked MCP sessions shared by the app"""
+import asyncio
+import json
+import os
+import threading
+import time
+from mcp import ClientSession
+from mcp.client.stdio import stdio_client
+
+
+class PooledSession:
+    """One MCP server subprocess with an initialized ClientSession.
+
+    The stdio transport and session are entered and exited inside a single
+    owner task (anyio cancel scopes must not cross tasks), so the session
+    stays open until close() is called or the subprocess dies.
+    """
+
+    def __init__(self, server_params):
+        self.server_params = server_params
+        self.session = None
+        self.error = None
+        self.last_used = time.monotonic()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = None
+
+    async def open(self, timeout):
+        """Start the subprocess and wait until the session is initialized"""
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise ConnectionError(f"MCP session did not initialize within {timeout}s")
+
+        if self.session is None:
+            raise ConnectionError(f"MCP session failed to start: {self.error}")
+
+    async def _run(self):
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self):
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def close(self):
+        """Shut down the session and its subprocess"""
+        self._closing.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, 5)
+        except Exception:
+            self._task.cancel()
+
+
+class MCPSessionPool:
+    """Bounded pool of MCP sessions that any event loop in the app can use.
+
+    Sessions live on a private event loop thread, so the autonomous agent loop,
+    per-request chat loops and voice monitor loops all share the same
+    subprocesses. Callers just await call_tool() from their own loop.
+    """
+
+    def __init__(self, server_params, max_size=None, call_timeout=None, health_check_interval=None):
+        self.server_params = server_params
+        self.max_size = max_size or int(os.getenv("SERVICENOW_MCP_POOL_SIZE", "4"))
+        self.call_timeout = call_timeout or float(os.getenv("SERVICENOW_MCP_CALL_TIMEOUT", "60"))
+        self.health_check_interval = health_check_interval or float(os.getenv("SERVICENOW_MCP_HEALTH_INTERVAL", "30"))
+        self.connect_timeout = float(os.getenv("SERVICENOW_MCP_CONNECT_TIMEOUT", "30"))
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._idle = []
+        self._open = 0
+        self._counters = {
+            "created": 0,
+            "reconnects": 0,
+            "calls": 0,
+            "errors": 0,
+            "health_checks": 0,
+        }
+
+    def _ensure_loop(self):
+        """Start the pool's event loop thread on first use"""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-pool", daemon=True)
+                self._thread.start()
+                print(f"✓ MCP session pool started (max {self.max_size} sessions)", flush=True)
+        return self._loop
+
+    async def call_tool(self, tool_name, arguments):
+        """Call an MCP tool on a pooled session - returns the parsed JSON result or None"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._call_tool(tool_name, arguments), loop)
+        return await asyncio.wrap_future(future)
+
+    async def _call_tool(self, tool_name, arguments):
+        self._counters["calls"] += 1
+        pooled = await self._acquire()
+
+        try:
+            result = await asyncio.wait_for(
+                pooled.session.call_tool(tool_name, arguments),
+                self.call_timeout
+            )
+        except asyncio.CancelledError:
+            # A reply may still arrive for the abandoned request, so don't reuse the session
+            await self._discard(pooled)
+            raise
+        except Exception as e:
+            # The request may already have reached the server, so the call is
+            # not retried; the session is dropped and replaced on next acquire
+            self._counters["errors"] += 1
+            print(f"✗ MCP call {tool_name} failed, dropping session: {e!r}", flush=True)
+            await self._discard(pooled)
+            raise
+
+        self._release(pooled)
+        return self._parse_result(result)
+
+    def _parse_result(self, result):
+        if not result or not result.content:
+            return None
+
+        text = result.content[0].text
+        if getattr(result, "isError", False):
+            return {"success": False, "message": text}
+
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return {"success": False, "message": text}
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if await self._is_healthy(pooled):
+                    return pooled
+                print("⚠️  Pooled MCP session unhealthy, reconnecting", flush=True)
+                self._counters["reconnects"] += 1
+                await self._close_session(pooled)
+
+            return await self._open_session()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _is_healthy(self, pooled):
+        if not pooled.alive:
+            return False
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+
+        self._counters["health_checks"] += 1
+        try:
+            await asyncio.wait_for(pooled.session.send_ping(), 5)
+            return True
+        except Exception:
+            return False
+
+    async def _open_session(self):
+        pooled = PooledSession(self.server_params)
+        try:
+            await pooled.open(self.connect_timeout)
+        except asyncio.CancelledError:
+            await pooled.close()
+            raise
+        self._open += 1
+        self._counters["created"] += 1
+        return pooled
+
+    async def _close_session(self, pooled):
+        await pooled.close()
+        self._open -= 1
+
+    def _release(self, pooled):
+        pooled.last_used = time.monotonic()
+        self._idle.append(pooled)
+        self._slots.release()
+
+    async def _discard(self, pooled):
+        try:
+            await self._close_session(pooled)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """Pool size and usage counters"""
+        return {
+            "max_size": self.max_size,
+            "open": self._open,
+            "idle": len(self._idle),
+            "in_use": self._open - len(self._idle),
+            **self._counters
+        }
+
+    def close(self):
+        """Close every pooled session and stop the pool's loop"""
+        if self._loop is None:
+            return
+
+        async def _close_all():
+            while self._idle:
+                await self._close_session(self._idle.pop())
+
+        asyncio.run_coroutine_threadsafe(_close_all(), self._loop).result(timeout=30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
@@ -0,0 +1,14 @@
+"""Metrics helpers shared by the agent's stats endpoints"""
+
+
+def summarize(values):
+    """Count / p50 / p95 / max summary of a sample of numbers"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
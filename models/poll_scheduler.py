@@ -0,0 +1,83 @@
+"""Poll Scheduler - adaptive interval for the autonomous agent's ServiceNow polling"""
+import os
+import random
+import time
+from collections import deque
+from models.metrics import summarize
+
+
+class PollScheduler:
+    """Decides how long the agent loop sleeps between ServiceNow polls.
+
+    - New tickets found: poll again after the short fast-lane interval
+    - Empty polls: back off exponentially from the base interval
+    - Errors: back off exponentially, separately from empty polls
+    Every delay is capped at max_interval and randomized by +/- jitter.
+    """
+
+    def __init__(self, base_interval=None, fast_interval=None, max_interval=None,
+                 backoff_factor=None, jitter=None):
+        self.base_interval = base_interval or float(os.getenv("SERVICENOW_POLL_INTERVAL", "60"))
+        self.fast_interval = fast_interval or float(os.getenv("SERVICENOW_POLL_FAST_INTERVAL", "5"))
+        self.max_interval = max_interval or float(os.getenv("SERVICENOW_POLL_MAX_INTERVAL", "300"))
+        self.backoff_factor = backoff_factor or float(os.getenv("SERVICENOW_POLL_BACKOFF", "2"))
+        self.jitter = jitter if jitter is not None else float(os.getenv("SERVICENOW_POLL_JITTER", "0.1"))
+
+        self.interval = self.base_interval
+        self.polls = 0
+        self.consecutive_errors = 0
+        self.consecutive_empty = 0
+        self.total_errors = 0
+        self.total_new_tickets = 0
+        self.last_poll_at = None
+
+        self._loop_latencies = deque(maxlen=200)
+        self._queue_ages = deque(maxlen=200)
+
+    def record_poll(self, latency, new_tickets=0, error=False):
+        """Record one loop iteration and pick the next interval"""
+        self.polls += 1
+        self.last_poll_at = time.time()
+        self._loop_latencies.append(latency)
+
+        if error:
+            self.consecutive_errors += 1
+            self.total_errors += 1
+            self.interval = self._backoff(self.consecutive_errors)
+            return
+
+        self.consecutive_errors = 0
+        if new_tickets:
+            self.consecutive_empty = 0
+            self.total_new_tickets += new_tickets
+            self.interval = self.fast_interval
+        else:
+            self.consecutive_empty += 1
+            self.interval = self._backoff(self.consecutive_empty - 1)
+
+    def record_queue_age(self, age_seconds):
+        """Record how long a ticket waited in ServiceNow before the agent picked it up"""
+        if age_seconds is not None and age_seconds >= 0:
+            self._queue_ages.append(age_seconds)
+
+    def next_delay(self):
+        """Seconds to sleep before the next poll"""
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+    def _backoff(self, exponent):
+        return min(self.max_interval, self.base_interval * (self.backoff_factor ** exponent))
+
+    def stats(self):
+        """Interval state plus loop latency and queue age summaries (seconds)"""
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "consecutive_errors": self.consecutive_errors,
+            "consecutive_empty": self.consecutive_empty,
+            "total_errors": self.total_errors,
+            "total_new_tickets": self.total_new_tickets,
+            "last_poll_at": self.last_poll_at,
+            "loop_latency": summarize(self._loop_latencies),
+            "queue_age": summarize(self._queue_ages),
+        }
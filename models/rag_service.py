@@ -98,11 +98,11 @@ class RAGService:
         
         print(f"✓ Stored {len(documents)} documents!")
     
-    def search(self, query, top_k=3):
-        """Search for relevant documents"""
+    def search(self, query, top_k=3, embedding=None):
+        """Search for relevant documents - pass the query's embedding if already computed"""
         print(f"Searching for: {query}")
         
-        query_embedding = self.create_embedding(query)
+        query_embedding = embedding or self.create_embedding(query)
         
         results = self.index.query(
             vector=query_embedding,
@@ -1,67 +1,180 @@
-import os, json, re, asyncio
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+import os, re, asyncio, time
+from datetime import datetime, timezone
 from models.llm_factory import AbstractLLMServiceFactory
+from models.servicenow_transport import AbstractServiceNowTransport
+from models.poll_scheduler import PollScheduler
+from models.watermark import Watermark
+from models.ticket_workers import TicketWorkerPool
+from models.ticket_store import ProcessedTicketStore
+from models.ticket_lease import AbstractLeaseBackend
+from models.ticket_cache import TicketCache
+from models.token_counter import truncate_to_tokens
+from models.llm_cache import LLMResponseCache
+from models.llm_batch import AbstractBatchBackend
+from models.llm_services import RATE_GOVERNOR
+from models.ticket_triage import TicketTriage
 
 class ServiceNow:
 
-    processed_tickets = set()
+    # Watermark field -> (list_incidents filter argument, key in returned incidents)
+    WATERMARK_FIELDS = {
+        "sys_updated_on": ("updated_after", "updated_on"),
+        "sys_created_on": ("created_after", "created_on"),
+    }
+
+    # Default batch backend per LLM type (LLM_BATCH_BACKEND overrides)
+    BATCH_BACKENDS = {"Claude": "anthropic", "OPENAI": "openai"}
+
+    # Fields projected when only a ticket summary is needed
+    SUMMARY_FIELDS = ["number", "short_description", "priority", "state"]
 
     def __init__(self):
         self.assignment_group = os.getenv("SERVICENOW_ASSIGNMENT_GROUP_ID", "16eb774083b836101bf4ffd6feaad360")
         self.preferred_llm = None  # Stores LLM TYPE (string like "Claude"), not instance
 
+        # "stdio" = pooled servicenow_mcp subprocesses, "inprocess" = direct tool dispatch
+        self.transport = AbstractServiceNowTransport.get_transport(
+            os.getenv("SERVICENOW_TRANSPORT", "stdio")
+        )
+        self.scheduler = PollScheduler()
+        self.ticket_cache = TicketCache()
+
+        # Survives restarts so tickets aren't analyzed (and written to) twice
+        self.processed_tickets = ProcessedTicketStore(
+            os.getenv("SERVICENOW_PROCESSED_DB", os.path.join("data", "processed_tickets.db"))
+        )
+
+        # Exact + semantic cache in front of ticket analysis
+        self.analysis_cache = LLMResponseCache(
+            os.getenv("LLM_CACHE_DB", os.path.join("data", "llm_cache.db"))
+        )
+        self.semantic_cache = os.getenv("LLM_CACHE_SEMANTIC", "true").lower() == "true"
+
+        # Rules/small-model triage so only hard tickets reach the big model
+        self.triage = TicketTriage()
+
+        # Incremental polling: only fetch tickets at/after the persisted mark
+        self.watermark = Watermark(
+            os.getenv("SERVICENOW_WATERMARK_FILE", os.path.join("data", "servicenow_watermark.json")),
+            field=os.getenv("SERVICENOW_WATERMARK_FIELD", "sys_updated_on")
+        )
+        self.poll_page_size = int(os.getenv("SERVICENOW_POLL_PAGE_SIZE", "50"))
+        self.poll_max_pages = int(os.getenv("SERVICENOW_POLL_MAX_PAGES", "20"))
+        self.list_page_size = int(os.getenv("SERVICENOW_LIST_PAGE_SIZE", "100"))
+        self.list_max_tickets = int(os.getenv("SERVICENOW_LIST_MAX_TICKETS", "25"))
+        self.context_max_tickets = int(os.getenv("SERVICENOW_CONTEXT_MAX_TICKETS", "10"))
+        self.context_fetch_concurrency = int(os.getenv("SERVICENOW_CONTEXT_CONCURRENCY", "4"))
+        self.context_token_budget = int(os.getenv("SERVICENOW_CONTEXT_TOKEN_BUDGET", "6000"))
+        self.max_ticket_attempts = int(os.getenv("SERVICENOW_MAX_TICKET_ATTEMPTS", "3"))
+        self._ticket_attempts = {}
+        self._given_up_tickets = set()
+        self.workers = None  # TicketWorkerPool, created on the agent loop
+        
+        # Large sweeps (restart, outage) go through the provider batch API instead of the workers
+        self.batch_threshold = int(os.getenv("SERVICENOW_BATCH_THRESHOLD", "50"))
+        self.batch_max_priority = int(os.getenv("SERVICENOW_BATCH_MAX_PRIORITY", "2"))  # P1/P2 never wait on a batch
+        self.backfill_prepare_concurrency = int(os.getenv("SERVICENOW_BACKFILL_CONCURRENCY", "4"))  # embed + RAG per ticket
+        self._backfilling = set()
+        self._backfill_tasks = set()
+        self._agent_loop = None
+        self._event_counters = {"received": 0, "queued": 0, "skipped": 0, "failed": 0}
+
+        # With push notifications enabled, polling is only a slow reconciliation sweep
+        self.webhook_secret = os.getenv("SERVICENOW_WEBHOOK_SECRET")
+        if self.webhook_secret:
+            reconcile_interval = float(os.getenv("SERVICENOW_RECONCILE_INTERVAL", "900"))
+            self.scheduler = PollScheduler(
+                base_interval=reconcile_interval,
+                fast_interval=reconcile_interval,
+                max_interval=max(reconcile_interval, self.scheduler.max_interval)
+            )
+
+        # Leases keep several agent instances from analyzing the same ticket
+        self.leases = AbstractLeaseBackend.get_backend(os.getenv("SERVICENOW_LEASE_BACKEND", "sqlite"))
+        self.instance_id = AbstractLeaseBackend.default_owner()
+        self.lease_ttl = float(os.getenv("SERVICENOW_LEASE_TTL", "120"))
+
     def set_preferred_llm(self, llm_type):
         """Set preferred LLM type"""
         self.preferred_llm = llm_type
         print(f"ServiceNow preferred LLM set to: {llm_type}", flush=True)
 
+    async def call_tool(self, tool_name, arguments):
+        """Call a ServiceNow MCP tool - returns the result dict or None"""
+        return await self.transport.call_tool(tool_name, arguments)
+
+    def stats(self):
+        """Runtime stats for the ServiceNow integration"""
+        return {
+            "transport": self.transport.stats(),
+            "ticket_cache": self.ticket_cache.stats(),
+            "analysis_cache": self.analysis_cache.stats(),
+            "scheduler": self.scheduler.stats(),
+            "workers": self.workers.stats() if self.workers else None,
+            "backfilling": len(self._backfilling),
+            "events": dict(self._event_counters),
+            "processed_tickets": self.processed_tickets.stats(),
+            "leases": {"instance_id": self.instance_id, **self.leases.stats()},
+            "llm": AbstractLLMServiceFactory.stats(),
+            "rate_limits": RATE_GOVERNOR.stats(),
+            "triage": self.triage.stats()
+        }
+
+    @staticmethod
+    def ticket_age(ticket):
+        """Seconds since the ticket was created, or None if unknown"""
+        created_on = ticket.get('created_on') or ticket.get('sys_created_on')
+        if not created_on:
+            return None
+        try:
+            created = datetime.strptime(created_on, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+        return (datetime.now(timezone.utc) - created).total_seconds()
+
+    @staticmethod
+    def ticket_priority(ticket):
+        """Numeric priority 1 (critical) - 5 (planning); accepts '2' or '2 - High'"""
+        try:
+            return int(str(ticket.get('priority', '')).split()[0])
+        except (ValueError, IndexError):
+            return 5
+
     async def create_ticket(self, short_description, description, priority="3"):
         """Create a new ServiceNow ticket"""
         print(f"Creating ticket: {short_description}", flush=True)
         
-        server_params = StdioServerParameters(
-            command="python",
-            args=["-m", "servicenow_mcp.cli"],
-            env=dict(os.environ)
-        )
-        
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
+        try:
+            data = await self.call_tool(
+                "create_incident",
+                {
+                    "short_description": short_description,
+                    "description": description,
+                    "priority": priority,
+                    "assignment_group": self.assignment_group
+                }
+            )
+            
+            if data:
+                print(f"Create ticket response: {data}", flush=True)
                 
-                try:
-                    result = await session.call_tool(
-                        "create_incident",
-                        {
-                            "short_description": short_description,
-                            "description": description,
-                            "priority": priority,
-                            "assignment_group": self.assignment_group
-                        }
-                    )
-                    
-                    if result and result.content:
-                        data = json.loads(result.content[0].text)
-                        print(f"Create ticket response: {data}", flush=True)
-                        
-                        if data.get('success'):
-                            ticket_number = data.get('incident_number')
-                            sys_id = data.get('incident_id')
-                            print(f"✓ Created ticket: {ticket_number}", flush=True)
+                if data.get('success'):
+                    ticket_number = data.get('incident_number')
+                    sys_id = data.get('incident_id')
+                    print(f"✓ Created ticket: {ticket_number}", flush=True)
 
-                            return {
-                                "success": True,
-                                "ticket_number": ticket_number,
-                                "sys_id": sys_id,
-                                "message": f"Ticket {ticket_number} created successfully"
-                            }
-                        else:
-                            return {"success": False, "message": data.get('message')}
-                    
-                except Exception as e:
-                    print(f"Error creating ticket: {e}", flush=True)
-                    return {"success": False, "message": str(e)}
+                    return {
+                        "success": True,
+                        "ticket_number": ticket_number,
+                        "sys_id": sys_id,
+                        "message": f"Ticket {ticket_number} created successfully"
+                    }
+                else:
+                    return {"success": False, "message": data.get('message')}
+            
+        except Exception as e:
+            print(f"Error creating ticket: {e}", flush=True)
+            return {"success": False, "message": str(e)}
         
         return {"success": False, "message": "No response"}
 
@@ -69,150 +182,310 @@ class ServiceNow:
         """Update an existing ServiceNow ticket"""
         print(f"Updating ticket: {ticket_number}", flush=True)
         
-        # First get the ticket to find sys_id
+        sys_id, error = await self._resolve_sys_id(ticket_number)
+        if error:
+            return error
+        
+        try:
+            update_data = {"incident_id": sys_id}
+            if work_notes:
+                update_data["work_notes"] = work_notes
+            if state:
+                update_data["state"] = state
+            
+            print(f"Calling update_incident with: {update_data}", flush=True)
+            
+            data = await self.call_tool("update_incident", update_data)
+            
+            if data:
+                print(f"Update result: {data}", flush=True)
+                
+                if data.get('success'):
+                    self.ticket_cache.invalidate(ticket_number)
+                    print(f"✓ Updated ticket {ticket_number}", flush=True)
+                    return {
+                        "success": True,
+                        "message": f"Ticket {ticket_number} updated successfully"
+                    }
+                else:
+                    print(f"✗ Update failed: {data.get('message')}", flush=True)
+                    return {"success": False, "message": data.get('message')}
+            
+        except Exception as e:
+            print(f"✗ Error updating ticket: {e}", flush=True)
+            import traceback
+            traceback.print_exc()
+            return {"success": False, "message": str(e)}
+        
+        return {"success": False, "message": "No response"}
+
+    async def _resolve_sys_id(self, ticket_number):
+        """Ticket number -> (sys_id, None) or (None, error result); cached mappings skip the lookup"""
+        sys_id = self.ticket_cache.sys_id_for(ticket_number)
+        if sys_id:
+            return sys_id, None
+        
         ticket_query_result = await self.get_ticket_data(ticket_number)
         
         if not ticket_query_result.get('success'):
             print(f"✗ Failed to find ticket {ticket_number}", flush=True)
-            return {"success": False, "message": "Ticket not found"}
+            return None, {"success": False, "message": "Ticket not found"}
         
-        ticket = ticket_query_result.get('ticket', {})
-        sys_id = ticket.get('sys_id')
+        sys_id = ticket_query_result.get('ticket', {}).get('sys_id')
         
         if not sys_id:
             print(f"✗ No sys_id found for {ticket_number}", flush=True)
-            return {"success": False, "message": "Could not get ticket sys_id"}
+            return None, {"success": False, "message": "Could not get ticket sys_id"}
         
         print(f"Found sys_id: {sys_id}", flush=True)
-        
-        server_params = StdioServerParameters(
-            command="python",
-            args=["-m", "servicenow_mcp.cli"],
-            env=dict(os.environ)
-        )
-        
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                
-                try:
-                    update_data = {"incident_id": sys_id}
-                    if work_notes:
-                        update_data["work_notes"] = work_notes
-                    if state:
-                        update_data["state"] = state
-                    
-                    print(f"Calling update_incident with: {update_data}", flush=True)
-                    
-                    result = await session.call_tool("update_incident", update_data)
-                    
-                    if result and result.content:
-                        data = json.loads(result.content[0].text)
-                        print(f"Update result: {data}", flush=True)
-                        
-                        if data.get('success'):
-                            print(f"✓ Updated ticket {ticket_number}", flush=True)
-                            return {
-                                "success": True,
-                                "message": f"Ticket {ticket_number} updated successfully"
-                            }
-                        else:
-                            print(f"✗ Update failed: {data.get('message')}", flush=True)
-                            return {"success": False, "message": data.get('message')}
-                    
-                except Exception as e:
-                    print(f"✗ Error updating ticket: {e}", flush=True)
-                    import traceback
-                    traceback.print_exc()
-                    return {"success": False, "message": str(e)}
-        
-        return {"success": False, "message": "No response"}
+        return sys_id, None
 
     async def close_ticket(self, ticket_number, resolution_notes, close_code="Solved"):
-        """Close a ServiceNow ticket - two-step process"""
+        """Close a ServiceNow ticket - resolve and close in a single MCP call"""
         print(f"Closing ticket: {ticket_number}", flush=True)
         
-        # Step 1: Move to Resolved (state 6) with resolution notes
-        print(f"Step 1: Resolving ticket...", flush=True)
-        resolve_result = await self.update_ticket(
-            ticket_number=ticket_number,
-            work_notes=f"Resolution: {resolution_notes}\nClose Code: {close_code}",
-            state="6"  # Resolved first
-        )
+        sys_id, error = await self._resolve_sys_id(ticket_number)
+        if error:
+            return error
         
-        if not resolve_result.get('success'):
-            return resolve_result
+        try:
+            data = await self.call_tool(
+                "close_incident",
+                {
+                    "incident_id": sys_id,
+                    "close_code": close_code,
+                    "close_notes": resolution_notes,
+                    "work_notes": f"Resolution: {resolution_notes}\nClose Code: {close_code}"
+                }
+            )
+            
+            if data:
+                print(f"Close result: {data}", flush=True)
+                # Even a failed close may have resolved the ticket
+                self.ticket_cache.invalidate(ticket_number)
+                
+                if data.get('success'):
+                    print(f"✓ Closed ticket {ticket_number}", flush=True)
+                    return {
+                        "success": True,
+                        "message": f"Ticket {ticket_number} closed successfully"
+                    }
+                else:
+                    print(f"✗ Close failed: {data.get('message')}", flush=True)
+                    return {"success": False, "message": data.get('message')}
         
-        # Step 2: Move to Closed (state 7)
-        print(f"Step 2: Closing ticket...", flush=True)
-        close_result = await self.update_ticket(
-            ticket_number=ticket_number,
-            state="7"  # Now close it
-        )
+        except Exception as e:
+            print(f"✗ Error closing ticket: {e}", flush=True)
+            return {"success": False, "message": str(e)}
         
-        return close_result
+        return {"success": False, "message": "No response"}
 
-    async def check_new_tickets(self, session):
-        """Poll ServiceNow for new tickets assigned to Network_Agents group"""
+    async def check_new_tickets(self):
+        """Poll ServiceNow for new tickets assigned to Network_Agents group since the watermark"""
+        since_argument, _ = self.WATERMARK_FIELDS[self.watermark.field]
+        incidents = []
+        offset = 0
+        
         try:
-            result = await session.call_tool(
-                "list_incidents",
-                {
+            for _ in range(self.poll_max_pages):
+                arguments = {
                     "state": "1",
-                    "limit": 10,
-                    "assignment_group": self.assignment_group
+                    "limit": self.poll_page_size,
+                    "offset": offset,
+                    "assignment_group": self.assignment_group,
+                    "order_by": self.watermark.field,
+                    "display_value": False  # raw values: UTC times, numeric priority
                 }
-            )
-            return result
+                if self.watermark.value:
+                    arguments[since_argument] = self.watermark.value
+                
+                data = await self.call_tool("list_incidents", arguments)
+                if not data or not data.get('success'):
+                    return data
+                
+                page = data.get('incidents', [])
+                incidents.extend(page)
+                if len(page) < self.poll_page_size:
+                    break
+                offset += len(page)
+            
+            return {"success": True, "incidents": incidents}
         except Exception as e:
             print(f"Error fetching tickets: {e}", flush=True)
             return None
     
+    def _finish_ticket(self, sys_id, succeeded):
+        """Release a polled ticket from the watermark once handled or out of retries"""
+        if succeeded is None:
+            # Deferred (leased by another instance) - keep it pending, not a failed attempt
+            return
+        if succeeded:
+            self._ticket_attempts.pop(sys_id, None)
+            self.watermark.complete(sys_id)
+            return
+        
+        attempts = self._ticket_attempts.get(sys_id, 0) + 1
+        self._ticket_attempts[sys_id] = attempts
+        if attempts >= self.max_ticket_attempts:
+            print(f"✗ Giving up on {sys_id} after {attempts} attempts", flush=True)
+            self._ticket_attempts.pop(sys_id, None)
+            self._given_up_tickets.add(sys_id)
+            self.watermark.complete(sys_id)
+    
+    async def iter_open_tickets(self, batch_size=None, fields=None):
+        """Page through every open ticket in the network queue, yielding one batch per MCP call"""
+        batch_size = batch_size or self.list_page_size
+        offset = 0
+        
+        while True:
+            arguments = {
+                "assignment_group": self.assignment_group,
+                "active": True,
+                "order_by": "number",  # stable order so offset paging doesn't skip or repeat
+                "limit": batch_size,
+                "offset": offset
+            }
+            if fields:
+                arguments["fields"] = fields
+            
+            data = await self.call_tool("list_incidents", arguments)
+            if not data or not data.get('success'):
+                message = data.get('message') if data else "No response"
+                raise RuntimeError(f"Failed to list tickets: {message}")
+            
+            batch = data.get('incidents', [])
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            offset += len(batch)
+    
     async def list_open_tickets(self):
         """List all open tickets in the network queue"""
         try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=["-m", "servicenow_mcp.cli"],
-                env=dict(os.environ)
-            )
+            count = 0
+            listed = []
             
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    
-                    result = await session.call_tool(
-                        "list_incidents",
-                        {"assignment_group": self.assignment_group}
-                    )
-                    
-                    if result and result.content:
-                        data = json.loads(result.content[0].text)
-                        
-                        if data.get('success'):
-                            tickets = data.get('incidents', [])
-                            
-                            # Return summary format
-                            return {
-                                "success": True,
-                                "count": len(tickets),
-                                "summary": f"There are {len(tickets)} open tickets in the network queue",
-                                "tickets": [
-                                    {
-                                        "number": t.get("number"),
-                                        "short_description": t.get("short_description"),
-                                        "priority": t.get("priority"),
-                                        "state": t.get("state")
-                                    } for t in tickets
-                                ]
-                            }
-                    
-                    return {"success": False, "message": "Failed to list tickets"}
+            async for batch in self.iter_open_tickets(fields=self.SUMMARY_FIELDS):
+                count += len(batch)
+                # Count everything, but only keep enough tickets for a readable answer
+                for t in batch[:max(0, self.list_max_tickets - len(listed))]:
+                    listed.append({
+                        "number": t.get("number"),
+                        "short_description": t.get("short_description"),
+                        "priority": t.get("priority"),
+                        "state": t.get("state")
+                    })
+            
+            summary = f"There are {count} open tickets in the network queue"
+            if count > len(listed):
+                summary += f" (showing the first {len(listed)})"
+            
+            # Return summary format
+            return {
+                "success": True,
+                "count": count,
+                "summary": summary,
+                "tickets": listed
+            }
         
         except Exception as e:
             print(f"Error listing tickets: {e}", flush=True)
             return {"success": False, "error": str(e)}
         
+    async def ticket_stats(self, group_by=None, priority=None, state=None, include_closed=False):
+        """Ticket counts for the network queue, computed by ServiceNow (one small request)"""
+        arguments = {"assignment_group": self.assignment_group}
+        if group_by:
+            arguments["group_by"] = [group_by] if isinstance(group_by, str) else list(group_by)
+        if priority:
+            arguments["priority"] = str(priority)
+        if state:
+            arguments["state"] = str(state)
+        # An explicit state (e.g. 7 - Closed) already picks the tickets to count
+        if not include_closed and not state:
+            arguments["active"] = True
+        
+        try:
+            data = await self.call_tool("get_incident_stats", arguments)
+            
+            if data and data.get('success'):
+                scope = "open tickets" if "active" in arguments else "tickets"
+                summary = f"There are {data.get('count')} {scope} in the network queue"
+                if data.get('groups'):
+                    breakdown = ", ".join(
+                        f"{' / '.join(str(g.get(f)) for f in data.get('group_by', []))}: {g.get('count')}"
+                        for g in data['groups']
+                    )
+                    summary += f" ({breakdown})"
+                
+                return {
+                    "success": True,
+                    "count": data.get('count'),
+                    "groups": data.get('groups', []),
+                    "summary": summary
+                }
+            
+            return {"success": False, "message": data.get('message') if data else "No response"}
+        
+        except Exception as e:
+            print(f"Error getting ticket stats: {e}", flush=True)
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    def _ticket_text(ticket):
+        return f"""
+    Number: {ticket.get('number', 'N/A')}
+    Short Description: {ticket.get('short_description', 'N/A')}
+    Description: {ticket.get('description', 'N/A')}
+    """
+    
+    async def _cached_analysis(self, llm_type, ticket_text, rag_service=None):
+        """Earlier analysis of an identical or near-identical ticket - returns (analysis, embedding)"""
+        # Cache lookups hit SQLite and scan vectors - keep them off the agent loop
+        cached = await asyncio.to_thread(self.analysis_cache.get, llm_type, ticket_text)
+        embedding = None
+        if cached is None and rag_service and self.semantic_cache:
+            try:
+                embedding = await asyncio.to_thread(rag_service.create_embedding, ticket_text)
+                cached = await asyncio.to_thread(self.analysis_cache.get_similar, llm_type, embedding)
+            except Exception as e:
+                print(f"⚠️  Could not embed ticket for the analysis cache: {e}", flush=True)
+        if cached is None:
+            self.analysis_cache.record_miss()
+        return cached, embedding
+    
+    async def _build_analysis_prompt(self, ticket_text, rag_service=None, embedding=None):
+        """Analysis prompt for a ticket, with relevant documentation from RAG if available"""
+        # Search RAG for relevant documentation
+        context = ""
+        if rag_service:
+            print("✓ RAG service available, searching...", flush=True)
+            try:
+                # Blocking embed + Pinecone query - off the agent loop; reuses the cache's embedding
+                docs = await asyncio.to_thread(rag_service.search, ticket_text, 2, embedding)
+                print(f"✓ RAG returned {len(docs)} documents", flush=True)
+                if docs:
+                    context = "\n\n=== RELEVANT DOCUMENTATION ===\n"
+                    for i, doc in enumerate(docs):
+                        context += f"\n[Document {i+1} from {doc['source']}]:\n{doc['text']}\n"
+                        print(f"  - Doc {i+1}: {doc['source']} (score: {doc['score']:.3f})", flush=True)
+                    context += "\n=== END DOCUMENTATION ===\n"
+            except Exception as e:
+                print(f"❌ RAG search failed: {e}", flush=True)
+                import traceback
+                traceback.print_exc()
+        else:
+            print("❌ No RAG service provided!", flush=True)
+        
+        return f"""{context}
+
+    Analyze this ServiceNow ticket:
+    {ticket_text}
+
+    Based on the documentation above (if provided), what type of issue is this? 
+    Can it be automated? Provide a brief analysis and troubleshooting steps."""
+    
     async def analyze_ticket(self, ticket, llm=None, rag_service=None):
         """Analyze ticket - with optional RAG context"""
         try:
@@ -226,43 +499,24 @@ class ServiceNow:
             llm_service = AbstractLLMServiceFactory.get_llm_instance(llm_type)
             
             # Build ticket description
-            ticket_text = f"""
-    Number: {ticket.get('number', 'N/A')}
-    Short Description: {ticket.get('short_description', 'N/A')}
-    Description: {ticket.get('description', 'N/A')}
-    """
+            ticket_text = self._ticket_text(ticket)
             
-            # Search RAG for relevant documentation
-            context = ""
-            if rag_service:
-                print("✓ RAG service available, searching...", flush=True)
-                try:
-                    docs = rag_service.search(ticket_text, top_k=2)
-                    print(f"✓ RAG returned {len(docs)} documents", flush=True)
-                    if docs:
-                        context = "\n\n=== RELEVANT DOCUMENTATION ===\n"
-                        for i, doc in enumerate(docs):
-                            context += f"\n[Document {i+1} from {doc['source']}]:\n{doc['text']}\n"
-                            print(f"  - Doc {i+1}: {doc['source']} (score: {doc['score']:.3f})", flush=True)
-                        context += "\n=== END DOCUMENTATION ===\n"
-                except Exception as e:
-                    print(f"❌ RAG search failed: {e}", flush=True)
-                    import traceback
-                    traceback.print_exc()
-            else:
-                print("❌ No RAG service provided!", flush=True)
+            # Identical or near-identical tickets reuse an earlier analysis
+            cached, embedding = await self._cached_analysis(llm_type, ticket_text, rag_service)
+            if cached is not None:
+                print(f"✓ Reusing cached analysis for {ticket.get('number')}", flush=True)
+                return cached
             
             # Build analysis prompt
-            prompt = f"""{context}
-
-    Analyze this ServiceNow ticket:
-    {ticket_text}
-
-    Based on the documentation above (if provided), what type of issue is this? 
-    Can it be automated? Provide a brief analysis and troubleshooting steps."""
+            prompt = await self._build_analysis_prompt(ticket_text, rag_service, embedding)
             
-            # Analyze with LLM
-            result = await llm_service.analyze(prompt)
+            # Analyze with LLM - the small model unless triage says the ticket needs the big one
+            if self.triage.enabled:
+                label = await self.triage.triage(ticket, ticket_text, llm_service)
+                result = await self.triage.analyze(label["tier"], prompt, llm_service)
+            else:
+                result = await llm_service.analyze(prompt)
+            await asyncio.to_thread(self.analysis_cache.put, llm_type, ticket_text, result, embedding)
             return result
             
         except Exception as e:
@@ -271,10 +525,62 @@ class ServiceNow:
             traceback.print_exc()
             return None
         
-    async def take_ticket_ownership(self, session, sys_id, work_notes):
+    async def backfill_tickets(self, tickets, llm=None, rag_service=None):
+        """Analyze many tickets through the provider's batch API - returns {sys_id: processed}"""
+        llm_type = llm if llm is not None else self.preferred_llm
+        llm_service = AbstractLLMServiceFactory.get_llm_instance(llm_type)
+        backend = AbstractBatchBackend.get_backend(
+            os.getenv("LLM_BATCH_BACKEND") or self.BATCH_BACKENDS.get(llm_type, "local"), llm_service
+        )
+        outcomes = {}
+        
+        # Batches can run for a long time - hold every lease until the results are written
+        claimed = {}
+        for ticket in tickets:
+            sys_id = ticket['sys_id']
+            if await asyncio.to_thread(self.leases.claim, sys_id, self.instance_id, self.lease_ttl):
+                claimed[sys_id] = ticket
+            else:
+                outcomes[sys_id] = None  # another instance has it
+        heartbeat = asyncio.create_task(self._renew_leases(claimed))
+        
+        try:
+            analyses, prompts, embeddings = {}, {}, {}
+            limit = asyncio.Semaphore(self.backfill_prepare_concurrency)
+            
+            async def prepare(sys_id, ticket):
+                async with limit:
+                    ticket_text = self._ticket_text(ticket)
+                    analyses[sys_id], embeddings[sys_id] = await self._cached_analysis(llm_type, ticket_text, rag_service)
+                    if analyses[sys_id] is None:
+                        prompts[sys_id] = await self._build_analysis_prompt(ticket_text, rag_service, embeddings[sys_id])
+            
+            await asyncio.gather(*(prepare(sys_id, ticket) for sys_id, ticket in claimed.items()))
+            
+            print(f"📦 Backfilling {len(claimed)} tickets ({len(prompts)} to analyze, "
+                  f"{len(claimed) - len(prompts)} cached)", flush=True)
+            for sys_id, analysis in (await backend.run(prompts)).items():
+                analyses[sys_id] = analysis
+                await asyncio.to_thread(
+                    self.analysis_cache.put, llm_type, self._ticket_text(claimed[sys_id]), analysis, embeddings[sys_id]
+                )
+            
+            # Results map back to tickets by sys_id (the batch custom_id)
+            for sys_id, ticket in claimed.items():
+                outcomes[sys_id] = await self.complete_ticket(ticket, analyses[sys_id])
+        finally:
+            heartbeat.cancel()
+            for sys_id in claimed:
+                await asyncio.to_thread(
+                    self.leases.release, sys_id, self.instance_id, bool(outcomes.get(sys_id))
+                )
+        
+        return outcomes
+    
+    async def take_ticket_ownership(self, sys_id, work_notes):
         """Take ownership of ticket and update with AI analysis"""
         try:
-            result = await session.call_tool(
+            result = await self.call_tool(
                 "update_incident",
                 {
                     "incident_id": sys_id,
@@ -283,18 +589,23 @@ class ServiceNow:
                     "work_notes": work_notes
                 }
             )
+            self.ticket_cache.invalidate(sys_id=sys_id)
             return result
         except Exception as e:
             print(f"Error updating ticket: {e}", flush=True)
             return None
         
-    async def process_ticket(self, session, ticket, llm=None, rag_service= None):
+    async def process_ticket(self, ticket, llm=None, rag_service= None):
         """Process a single ticket - analyze and take ownership"""
         print(f"Processing: {ticket.get('number')} - {ticket.get('short_description')}", flush=True)
         
         # Analyze the ticket (pass llm if overriding, pass rag service)
         analysis = await self.analyze_ticket(ticket, llm=llm, rag_service= rag_service)
         
+        return await self.complete_ticket(ticket, analysis)
+    
+    async def complete_ticket(self, ticket, analysis):
+        """Write an analysis to the ticket and take ownership - True once recorded as processed"""
         if analysis:
             sys_id = ticket.get('sys_id')
             if sys_id:
@@ -305,77 +616,93 @@ Status: Ticket taken by AI Agent
 State changed: New → In Progress
 Assigned to: ai_user"""
                 
-                update_result = await self.take_ticket_ownership(session, sys_id, work_notes)
+                update_result = await self.take_ticket_ownership(sys_id, work_notes)
                 
-                if update_result:
+                if update_result and update_result.get('success'):
                     print(f"✓ Took ownership of {ticket.get('number')}", flush=True)
-                    ServiceNow.processed_tickets.add(sys_id)
+                    self.processed_tickets.add(sys_id)
                     return True
                 else:
                     print(f"✗ Failed to take ownership of {ticket.get('number')}", flush=True)
         
         return False
     
+    async def process_claimed_ticket(self, ticket, rag_service= None):
+        """Process a ticket only if this instance wins its lease - None means another instance has it"""
+        sys_id = ticket.get('sys_id')
+        
+        claimed = await asyncio.to_thread(self.leases.claim, sys_id, self.instance_id, self.lease_ttl)
+        if not claimed:
+            print(f"↷ {ticket.get('number')} is being handled by another agent instance", flush=True)
+            return None
+        
+        heartbeat = asyncio.create_task(self._renew_lease(sys_id))
+        processed = False
+        try:
+            processed = await self.process_ticket(ticket, rag_service= rag_service)
+            return processed
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.leases.release, sys_id, self.instance_id, bool(processed))
+    
+    async def _renew_leases(self, sys_ids):
+        """Keep a set of leases alive (batch backfills)"""
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            for sys_id in list(sys_ids):
+                renewed = await asyncio.to_thread(self.leases.renew, sys_id, self.instance_id, self.lease_ttl)
+                if not renewed:
+                    print(f"⚠️  Lost lease on {sys_id}", flush=True)
+    
+    async def _renew_lease(self, sys_id):
+        """Keep our lease alive while a long analysis runs"""
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            renewed = await asyncio.to_thread(self.leases.renew, sys_id, self.instance_id, self.lease_ttl)
+            if not renewed:
+                print(f"⚠️  Lost lease on {sys_id}", flush=True)
+                return
+    
     async def get_ticket_data(self, ticket_number):
         """Query a specific ticket by number - for voice queries"""
         print(f"Querying ticket: {ticket_number}", flush=True)
         
-        server_params = StdioServerParameters(
-            command="python",
-            args=["-m", "servicenow_mcp.cli"],
-            env=dict(os.environ)
-        )
+        cached = self.ticket_cache.get(ticket_number)
+        if cached is not None:
+            return {
+                "success": True,
+                "ticket": cached
+            }
         
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                
-                try:
-                    result = await session.call_tool(
-                        "get_incident_by_number",
-                        {"incident_number": ticket_number}
-                    )
-                    
-                    if result and result.content:
-                        data = json.loads(result.content[0].text)
-                        
-                        if data.get('success'):
-                            ticket = data.get('incident', {})
-                            return {
-                                "success": True,
-                                "ticket": ticket
-                            }
-                        else:
-                            return {
-                                "success": False,
-                                "message": data.get('message', 'Ticket not found')
-                            }
-                    
-                except Exception as e:
-                    print(f"Error querying ticket: {e}", flush=True)
-                    return {"success": False, "message": str(e)}
+        try:
+            data = await self.call_tool(
+                "get_incident_by_number",
+                {"incident_number": ticket_number}
+            )
+            
+            if data:
+                if data.get('success'):
+                    ticket = data.get('incident', {})
+                    self.ticket_cache.put(ticket)
+                    return {
+                        "success": True,
+                        "ticket": ticket
+                    }
+                else:
+                    return {
+                        "success": False,
+                        "message": data.get('message', 'Ticket not found')
+                    }
+            
+        except Exception as e:
+            print(f"Error querying ticket: {e}", flush=True)
+            return {"success": False, "message": str(e)}
         
         return {"success": False, "message": "No response"}
     
-    async def ask_llm_with_context(self, question, llm=None):
-        """Ask LLM a question with ServiceNow context - can override LLM per call"""
-        print(f"LLM query: {question}", flush=True)
-        
-        # Choose LLM type (override or default)
-        llm_type = llm if llm is not None else self.preferred_llm
-        
-        # Extract ticket number if mentioned
-        ticket_match = re.search(r'INC\d+', question, re.IGNORECASE)
-        
-        context = question
-
-        if ticket_match:
-            ticket_number = ticket_match.group(0).upper()
-            ticket_data = await self.get_ticket_data(ticket_number)
-            
-            if ticket_data.get('success'):
-                ticket = ticket_data.get('ticket', {})
-                context = f"""
+    @staticmethod
+    def _format_ticket_context(ticket):
+        return f"""
 Ticket Information:
 - Number: {ticket.get('number')}
 - Short Description: {ticket.get('short_description')}
@@ -387,7 +714,47 @@ Ticket Information:
 - Updated: {ticket.get('updated_on')}
 - Work Notes: {ticket.get('work_notes', 'No work notes')}
 - Comments: {ticket.get('comments', 'No comments')}
+"""
+    
+    async def gather_ticket_context(self, ticket_numbers):
+        """Fetch tickets concurrently and build a context block within the token budget"""
+        limit = asyncio.Semaphore(self.context_fetch_concurrency)
+        
+        async def fetch(number):
+            async with limit:
+                return await self.get_ticket_data(number)
+        
+        results = await asyncio.gather(*(fetch(number) for number in ticket_numbers))
+        
+        # Split the budget evenly; long work notes get cut rather than whole tickets dropped
+        per_ticket = self.context_token_budget // max(1, len(ticket_numbers))
+        blocks = []
+        for number, result in zip(ticket_numbers, results):
+            if result.get('success'):
+                block = self._format_ticket_context(result.get('ticket', {}))
+            else:
+                block = f"\nTicket {number}: not found ({result.get('message')})\n"
+            blocks.append(truncate_to_tokens(block, per_ticket))
+        
+        return "".join(blocks)
+    
+    async def ask_llm_with_context(self, question, llm=None):
+        """Ask LLM a question with ServiceNow context - can override LLM per call"""
+        print(f"LLM query: {question}", flush=True)
+        
+        # Choose LLM type (override or default)
+        llm_type = llm if llm is not None else self.preferred_llm
+        
+        # Extract every ticket number mentioned, in order, without duplicates
+        ticket_numbers = list(dict.fromkeys(
+            match.upper() for match in re.findall(r'INC\d+', question, re.IGNORECASE)
+        ))[:self.context_max_tickets]
+        
+        context = question
 
+        if ticket_numbers:
+            ticket_context = await self.gather_ticket_context(ticket_numbers)
+            context = f"""{ticket_context}
 User Question: {question}
 
 Provide helpful answer based on the ticket information above."""
@@ -414,54 +781,170 @@ Provide helpful answer based on the ticket information above."""
         print(f"Using LLM: {self.preferred_llm}", flush=True)
         print(f"Monitoring tickets for group: {self.assignment_group}", flush=True)
         
-        server_params = StdioServerParameters(
-            command="python",
-            args=["-m", "servicenow_mcp.cli"],
-            env=dict(os.environ)
+        self.workers = TicketWorkerPool(
+            lambda ticket: self.process_claimed_ticket(ticket, rag_service= rag_service),
+            on_done=lambda ticket, succeeded: self._finish_ticket(ticket['sys_id'], succeeded)
         )
+        self.workers.start()
+        self._agent_loop = asyncio.get_running_loop()
         
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                print("ServiceNow MCP connected", flush=True)
+        try:
+            await self._poll_forever(rag_service)
+        finally:
+            self._agent_loop = None
+            for task in list(self._backfill_tasks):
+                task.cancel()
+            await asyncio.gather(*self._backfill_tasks, return_exceptions=True)
+            print("Draining ticket workers...", flush=True)
+            await self.workers.shutdown()
+    
+    def _submit_ticket(self, ticket):
+        """Queue a ticket on the worker pool, ordered by its priority and age"""
+        age = self.ticket_age(ticket)
+        self.scheduler.record_queue_age(age)
+        return self.workers.submit(
+            ticket,
+            priority=self.ticket_priority(ticket),
+            created_at=time.time() - age if age is not None else None
+        )
+    
+    def _start_backfill(self, tickets, rag_service):
+        """Analyze tickets as one background batch, keeping them out of later polls until done"""
+        if not tickets:
+            return
+        self._backfilling.update(t['sys_id'] for t in tickets)
+        task = asyncio.create_task(self._run_backfill(tickets, rag_service))
+        self._backfill_tasks.add(task)
+        task.add_done_callback(self._backfill_tasks.discard)
+    
+    async def _run_backfill(self, tickets, rag_service):
+        outcomes = {}
+        try:
+            outcomes = await self.backfill_tickets(tickets, rag_service=rag_service)
+        except asyncio.CancelledError:
+            outcomes = {t['sys_id']: None for t in tickets}  # shutdown - not a failed attempt
+            raise
+        except Exception as e:
+            print(f"✗ Batch backfill failed: {e}", flush=True)
+        finally:
+            for ticket in tickets:
+                self._backfilling.discard(ticket['sys_id'])
+                self._finish_ticket(ticket['sys_id'], outcomes.get(ticket['sys_id'], False))
+    
+    def push_event(self, event):
+        """Hand a webhook event to the agent loop (called from Flask threads) - False if the agent isn't running"""
+        loop = self._agent_loop
+        if loop is None or loop.is_closed():
+            return False
+        
+        self._event_counters["received"] += 1
+        asyncio.run_coroutine_threadsafe(self.ingest_event(event), loop)
+        return True
+    
+    async def ingest_event(self, event):
+        """Queue a ticket pushed by a ServiceNow business rule, fetching it if the payload is partial"""
+        number = event.get('number')
+        ticket = event
+        
+        try:
+            if not (event.get('sys_id') and event.get('short_description')):
+                if not number:
+                    print("✗ Ignoring ServiceNow event without a ticket number", flush=True)
+                    self._event_counters["skipped"] += 1
+                    return False
+                self.ticket_cache.invalidate(number)
+                result = await self.get_ticket_data(number)
+                if not result.get('success'):
+                    print(f"✗ Could not fetch {number} for event: {result.get('message')}", flush=True)
+                    self._event_counters["failed"] += 1
+                    return False
+                ticket = result['ticket']
+            
+            sys_id = ticket.get('sys_id')
+            state = str(ticket.get('state', '1'))
+            group = event.get('assignment_group')
+            
+            if state not in ('1', 'New') or (group and group != self.assignment_group):
+                self._event_counters["skipped"] += 1
+                return False
+            if sys_id in self.processed_tickets or sys_id in self._given_up_tickets or sys_id in self._backfilling:
+                self._event_counters["skipped"] += 1
+                return False
+            
+            if self._submit_ticket(ticket):
+                print(f"⚡ Queued {ticket.get('number')} from ServiceNow event", flush=True)
+                self._event_counters["queued"] += 1
+                return True
+            
+            self._event_counters["skipped"] += 1
+            return False
+        
+        except Exception as e:
+            print(f"✗ Failed to ingest ServiceNow event for {number}: {e}", flush=True)
+            self._event_counters["failed"] += 1
+            return False
+    
+    async def _poll_forever(self, rag_service):
+        """Poll for new tickets and hand them to the worker pool"""
+        iteration = 0
+        while True:
+            iteration += 1
+            print(f"\n[Agent Iteration {iteration}] Checking for new tickets...", flush=True)
+            
+            started = time.monotonic()
+            new_count = 0
+            poll_failed = False
+            
+            try:
+                response_json = await self.check_new_tickets()
                 
-                iteration = 0
-                while True:
-                    iteration += 1
-                    print(f"\n[Agent Iteration {iteration}] Checking for new tickets...", flush=True)
+                if response_json and response_json.get('success') and 'incidents' in response_json:
+                    tickets = response_json['incidents']
+                    _, watermark_key = self.WATERMARK_FIELDS[self.watermark.field]
+                    for t in tickets:
+                        self.watermark.observe(t['sys_id'], t.get(watermark_key))
+                    self.watermark.retain(t['sys_id'] for t in tickets)
                     
-                    try:
-                        result = await self.check_new_tickets(session)
+                    new_tickets = []
+                    for t in tickets:
+                        if t['sys_id'] in self.processed_tickets or t['sys_id'] in self._given_up_tickets:
+                            self.watermark.complete(t['sys_id'])
+                        elif not self.workers.is_busy(t['sys_id']) and t['sys_id'] not in self._backfilling:
+                            new_tickets.append(t)
+                    new_count = len(new_tickets)
+                    
+                    if new_tickets:
+                        print(f"Found {len(new_tickets)} NEW unprocessed ticket(s)", flush=True)
+                        print(f"Processing tickets with RAG: {rag_service is not None}", flush=True)
                         
-                        if result and result.content:
-                            tickets_data = result.content[0].text
-                            
-                            try:
-                                response_json = json.loads(tickets_data)
-                                
-                                if response_json.get('success') and 'incidents' in response_json:
-                                    tickets = response_json['incidents']
-                                    new_tickets = [t for t in tickets if t['sys_id'] not in self.processed_tickets]
-                                    
-                                    if new_tickets:
-                                        print(f"Found {len(new_tickets)} NEW unprocessed ticket(s)", flush=True)
-                                        
-                                        for ticket in new_tickets:
-                                            # Uses self.preferred_llm
-                                            print(f"Processing ticket with RAG: {rag_service is not None}", flush=True)
-                                            await self.process_ticket(session, ticket, rag_service= rag_service)
-                                    else:
-                                        if tickets:
-                                            print(f"All {len(tickets)} tickets already processed", flush=True)
-                                else:
-                                    print("No new tickets", flush=True)
-                                    
-                            except json.JSONDecodeError as e:
-                                print(f"JSON error: {e}", flush=True)
+                        if self.batch_threshold and len(new_tickets) >= self.batch_threshold:
+                            self._start_backfill(
+                                [t for t in new_tickets if self.ticket_priority(t) > self.batch_max_priority],
+                                rag_service
+                            )
+                            new_tickets = [t for t in new_tickets if self.ticket_priority(t) <= self.batch_max_priority]
                         
-                    except Exception as e:
-                        print(f"Agent loop error: {e}", flush=True)
-                        import traceback
-                        traceback.print_exc()
-                    
-                    await asyncio.sleep(300)  # Check every 300 seconds
\ No newline at end of file
+                        for ticket in new_tickets:
+                            # Uses self.preferred_llm
+                            self._submit_ticket(ticket)
+                    else:
+                        if tickets:
+                            print(f"All {len(tickets)} tickets already processed or in progress", flush=True)
+                        else:
+                            print("No new tickets", flush=True)
+                else:
+                    poll_failed = True
+                    message = response_json.get('message') if response_json else "No response"
+                    print(f"✗ Ticket poll failed: {message}", flush=True)
+                
+            except Exception as e:
+                poll_failed = True
+                print(f"Agent loop error: {e}", flush=True)
+                import traceback
+                traceback.print_exc()
+            
+            self.watermark.commit()
+            self.scheduler.record_poll(time.monotonic() - started, new_tickets=new_count, error=poll_failed)
+            delay = self.scheduler.next_delay()
+            print(f"Next poll in {delay:.1f}s", flush=True)
+            await asyncio.sleep(delay)
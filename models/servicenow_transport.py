@@ -0,0 +1,118 @@
+"""ServiceNow transports - how ServiceNow tool calls reach servicenow_mcp"""
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from mcp import StdioServerParameters
+from models.mcp_pool import MCPSessionPool
+
+
+class AbstractServiceNowTransport(ABC):
+
+    _transports_registry = dict()
+
+    def __init_subclass__(cls, /, transport: str):
+        AbstractServiceNowTransport._transports_registry[transport] = cls
+
+    @abstractmethod
+    async def call_tool(self, tool_name, arguments):
+        """Call a servicenow_mcp tool - returns the result dict or None"""
+        pass
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+    @classmethod
+    def get_transport(cls, transport: str):
+        concrete_class = cls._transports_registry.get(transport)
+        if concrete_class is None:
+            raise ValueError(f"Unknown ServiceNow transport: {transport}")
+        return concrete_class()
+
+
+class StdioTransport(AbstractServiceNowTransport, transport="stdio"):
+    """JSON-RPC to pooled servicenow_mcp subprocesses"""
+
+    def __init__(self):
+        self.pool = MCPSessionPool(
+            StdioServerParameters(
+                command="python",
+                args=["-m", "servicenow_mcp.cli"],
+                env=dict(os.environ)
+            )
+        )
+
+    async def call_tool(self, tool_name, arguments):
+        return await self.pool.call_tool(tool_name, arguments)
+
+    def stats(self):
+        return {"transport": "stdio", **self.pool.stats()}
+
+    def close(self):
+        self.pool.close()
+
+
+class InProcessTransport(AbstractServiceNowTransport, transport="inprocess"):
+    """Dispatches straight into the ServiceNowMCP tool registry, no subprocess or JSON-RPC"""
+
+    def __init__(self):
+        from servicenow_mcp.cli import create_config, parse_args
+        from servicenow_mcp.server import ServiceNowMCP
+
+        # Same env-driven configuration the CLI would build, minus our own argv
+        self.server = ServiceNowMCP(create_config(parse_args([])))
+        self.calls = 0
+        self.errors = 0
+        print(f"✓ ServiceNow in-process transport ready ({self.server.current_package_name} package)", flush=True)
+
+    async def call_tool(self, tool_name, arguments):
+        self.calls += 1
+
+        # Mirror ServiceNowMCP._call_tool_impl, which surfaces failures as error results
+        if tool_name not in self.server.tool_definitions:
+            return self._error(f"Unknown tool: {tool_name}")
+        if tool_name not in self.server.enabled_tool_names:
+            return self._error(
+                f"Tool '{tool_name}' is not enabled in the current package '{self.server.current_package_name}'."
+            )
+
+        impl_func, params_model, _return_annotation, _description, _serialization = (
+            self.server.tool_definitions[tool_name]
+        )
+
+        try:
+            params = params_model(**arguments)
+        except Exception as e:
+            return self._error(f"Invalid arguments for tool '{tool_name}': {e}")
+
+        try:
+            # Tool implementations make blocking requests calls
+            result = await asyncio.to_thread(
+                impl_func, self.server.config, self.server.auth_manager, params
+            )
+        except Exception as e:
+            return self._error(f"Error during execution of tool '{tool_name}': {e}")
+
+        return self._to_result_dict(result)
+
+    def _to_result_dict(self, result):
+        """Same shape the stdio transport gets back from JSON-decoding the tool output"""
+        if result is None or isinstance(result, (dict, list)):
+            return result
+        if hasattr(result, "model_dump"):
+            return result.model_dump(mode="json")
+
+        try:
+            return json.loads(result)
+        except (TypeError, json.JSONDecodeError):
+            return self._error(str(result))
+
+    def _error(self, message):
+        self.errors += 1
+        return {"success": False, "message": message}
+
+    def stats(self):
+        return {"transport": "inprocess", "calls": self.calls, "errors": self.errors}
@@ -0,0 +1,95 @@
+"""Ticket Cache - in-process read-through cache for ServiceNow ticket lookups"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TicketCache:
+    """TTL + LRU cache of ticket records, addressable by number or sys_id.
+
+    Shared by chat, voice and the autonomous agent (different threads), so all
+    access goes through a lock. The number <-> sys_id mapping never changes for
+    a ticket, so it outlives the cached record itself.
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl or float(os.getenv("SERVICENOW_TICKET_CACHE_TTL", "60"))
+        self.max_entries = max_entries or int(os.getenv("SERVICENOW_TICKET_CACHE_MAX", "500"))
+        self._entries = OrderedDict()   # number -> (expires_at, ticket)
+        self._sys_ids = OrderedDict()   # number -> sys_id
+        self._numbers = {}              # sys_id -> number
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(number):
+        return str(number).strip().upper()
+
+    def get(self, number):
+        """Cached ticket dict (a copy) or None"""
+        key = self._key(number)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return copy.deepcopy(entry[1])
+
+    def get_by_sys_id(self, sys_id):
+        number = self._numbers.get(sys_id)
+        return self.get(number) if number else None
+
+    def put(self, ticket):
+        """Cache a ticket record returned by ServiceNow"""
+        number = ticket.get('number')
+        if not number:
+            return
+        key = self._key(number)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(ticket))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+            self._remember_sys_id(key, ticket.get('sys_id'))
+
+    def _remember_sys_id(self, key, sys_id):
+        if not sys_id:
+            return
+        self._sys_ids[key] = sys_id
+        self._sys_ids.move_to_end(key)
+        self._numbers[sys_id] = key
+        while len(self._sys_ids) > self.max_entries * 4:
+            _, old_sys_id = self._sys_ids.popitem(last=False)
+            self._numbers.pop(old_sys_id, None)
+
+    def sys_id_for(self, number):
+        """Known sys_id for a ticket number, even if its record has expired"""
+        with self._lock:
+            return self._sys_ids.get(self._key(number))
+
+    def invalidate(self, number=None, sys_id=None):
+        """Drop a cached record after the ticket was written to"""
+        if number is None and sys_id is not None:
+            number = self._numbers.get(sys_id)
+        if number is None:
+            return
+        with self._lock:
+            if self._entries.pop(self._key(number), None) is not None:
+                self._counters["invalidations"] += 1
+
+    def stats(self):
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else None,
+            **self._counters
+        }
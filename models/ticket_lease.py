@@ -0,0 +1,116 @@
+"""Ticket Leases - make sure each ticket is processed by exactly one agent instance"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class AbstractLeaseBackend(ABC):
+
+    _backends_registry = dict()
+
+    def __init_subclass__(cls, /, backend: str):
+        AbstractLeaseBackend._backends_registry[backend] = cls
+
+    @abstractmethod
+    def claim(self, ticket_id, owner, ttl):
+        """Take the lease if it is free, expired or already ours - returns True on success"""
+        pass
+
+    @abstractmethod
+    def renew(self, ticket_id, owner, ttl):
+        """Extend a lease we hold - returns False if it was lost"""
+        pass
+
+    @abstractmethod
+    def release(self, ticket_id, owner, completed=False):
+        """Give the lease up; a completed ticket stays fenced off from other instances"""
+        pass
+
+    def stats(self):
+        return {}
+
+    @classmethod
+    def get_backend(cls, backend: str):
+        concrete_class = cls._backends_registry.get(backend)
+        if concrete_class is None:
+            raise ValueError(f"Unknown lease backend: {backend}")
+        return concrete_class()
+
+    @staticmethod
+    def default_owner():
+        return os.getenv("AGENT_INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SQLiteLeaseBackend(AbstractLeaseBackend, backend="sqlite"):
+    """Lease table in a SQLite file shared by every agent process on the host"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SERVICENOW_LEASE_DB", os.path.join("data", "ticket_leases.db"))
+        self.completed_ttl = float(os.getenv("SERVICENOW_LEASE_COMPLETED_TTL", "3600"))
+        self._lock = threading.Lock()
+        self._counters = {"claimed": 0, "contended": 0, "reclaimed": 0, "lost": 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ticket_leases "
+            "(ticket_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM ticket_leases WHERE expires_at < ?", (time.time() - 86400,))
+
+    def claim(self, ticket_id, owner, ttl):
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT owner, expires_at FROM ticket_leases WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+            # Single upsert statement, so concurrent claimers can't both win
+            cursor = self._db.execute(
+                "INSERT INTO ticket_leases (ticket_id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(ticket_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE ticket_leases.expires_at < ? OR ticket_leases.owner = excluded.owner",
+                (ticket_id, owner, now + ttl, now)
+            )
+
+        if cursor.rowcount != 1:
+            self._counters["contended"] += 1
+            return False
+
+        self._counters["claimed"] += 1
+        if previous and previous[0] != owner:
+            self._counters["reclaimed"] += 1
+            print(f"⚠️  Reclaimed expired lease on {ticket_id} from {previous[0]}", flush=True)
+        return True
+
+    def renew(self, ticket_id, owner, ttl):
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE ticket_leases SET expires_at = ? WHERE ticket_id = ? AND owner = ?",
+                (time.time() + ttl, ticket_id, owner)
+            )
+        if cursor.rowcount != 1:
+            self._counters["lost"] += 1
+            return False
+        return True
+
+    def release(self, ticket_id, owner, completed=False):
+        with self._lock:
+            if completed:
+                self._db.execute(
+                    "UPDATE ticket_leases SET expires_at = ? WHERE ticket_id = ? AND owner = ?",
+                    (time.time() + self.completed_ttl, ticket_id, owner)
+                )
+            else:
+                self._db.execute(
+                    "DELETE FROM ticket_leases WHERE ticket_id = ? AND owner = ?",
+                    (ticket_id, owner)
+                )
+
+    def stats(self):
+        return {"backend": "sqlite", "path": self.path, **self._counters}
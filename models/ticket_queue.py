@@ -0,0 +1,71 @@
+"""Ticket Queue - priority/SLA ordering for tickets waiting on the agent's workers"""
+import asyncio
+import itertools
+import os
+import time
+
+
+class QueuedTicket:
+    """A ticket plus the metadata used to order it"""
+
+    _sequence = itertools.count()
+
+    def __init__(self, ticket, priority=5, created_at=None):
+        self.ticket = ticket
+        self.priority = priority
+        self.enqueued_at = time.time()
+        self.created_at = created_at if created_at is not None else self.enqueued_at
+        self.seq = next(QueuedTicket._sequence)
+
+
+class TicketPriorityQueue(asyncio.Queue):
+    """asyncio.Queue that hands out the most urgent ticket first.
+
+    Order is priority (1 = critical), then ticket age. Waiting tickets gain one
+    priority level per aging_interval so low priorities cannot starve, and a
+    ticket within sla_warning of its SLA deadline jumps ahead of everything.
+    """
+
+    def __init__(self, aging_interval=None, sla_seconds=None, sla_warning=None):
+        self.aging_interval = aging_interval or float(os.getenv("SERVICENOW_PRIORITY_AGING", "600"))
+        self.sla_seconds = sla_seconds if sla_seconds is not None else self._parse_sla(
+            os.getenv("SERVICENOW_SLA_SECONDS", "")
+        )
+        self.sla_warning = sla_warning if sla_warning is not None else float(
+            os.getenv("SERVICENOW_SLA_WARNING", "0.2")
+        )
+        super().__init__()
+
+    @staticmethod
+    def _parse_sla(value):
+        """'1=900,2=3600' -> {1: 900.0, 2: 3600.0}"""
+        sla = {}
+        for item in value.split(","):
+            if "=" in item:
+                priority, seconds = item.split("=", 1)
+                sla[int(priority.strip())] = float(seconds)
+        return sla
+
+    def _init(self, maxsize):
+        self._queue = []
+
+    def _put(self, entry):
+        self._queue.append(entry)
+
+    def _get(self):
+        # Keys change as tickets age, so pick the minimum at dequeue time
+        now = time.time()
+        index = min(range(len(self._queue)), key=lambda i: self._sort_key(self._queue[i], now))
+        return self._queue.pop(index)
+
+    def _sort_key(self, entry, now):
+        effective = entry.priority - int((now - entry.enqueued_at) // self.aging_interval)
+
+        deadline = float("inf")
+        sla = self.sla_seconds.get(entry.priority)
+        if sla:
+            deadline = entry.created_at + sla
+            if deadline - now <= sla * self.sla_warning:
+                effective = 0
+
+        return (effective, deadline, entry.created_at, entry.seq)
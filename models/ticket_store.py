@@ -0,0 +1,95 @@
+"""Processed Ticket Store - durable, bounded record of tickets the agent already handled"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProcessedTicketStore:
+    """Set-like store of processed ticket sys_ids.
+
+    Membership checks hit an in-memory LRU index; every add is also written to
+    SQLite so a restarted agent does not analyze the same tickets again.
+    Entries expire after ttl seconds and the oldest are evicted past max_entries.
+    """
+
+    def __init__(self, path, ttl=None, max_entries=None):
+        self.path = path
+        self.ttl = ttl or float(os.getenv("SERVICENOW_PROCESSED_TTL", str(30 * 24 * 3600)))
+        self.max_entries = max_entries or int(os.getenv("SERVICENOW_PROCESSED_MAX", "50000"))
+        self._index = OrderedDict()  # sys_id -> processed_at, oldest first
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS processed_tickets "
+            "(sys_id TEXT PRIMARY KEY, processed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._load()
+
+    def _load(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            self._db.execute("DELETE FROM processed_tickets WHERE processed_at < ?", (cutoff,))
+            rows = self._db.execute(
+                "SELECT sys_id, processed_at FROM processed_tickets ORDER BY processed_at DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            for sys_id, processed_at in reversed(rows):
+                self._index[sys_id] = processed_at
+            self._db.commit()
+        print(f"✓ Loaded {len(self._index)} processed tickets from {self.path}", flush=True)
+
+    def __contains__(self, sys_id):
+        with self._lock:
+            processed_at = self._index.get(sys_id)
+            if processed_at is None:
+                return False
+            if time.time() - processed_at > self.ttl:
+                self._remove(sys_id)
+                return False
+            self._index.move_to_end(sys_id)
+            return True
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, sys_id):
+        """Record a ticket as processed"""
+        now = time.time()
+        with self._lock:
+            self._index[sys_id] = now
+            self._index.move_to_end(sys_id)
+            self._db.execute(
+                "INSERT OR REPLACE INTO processed_tickets (sys_id, processed_at) VALUES (?, ?)",
+                (sys_id, now)
+            )
+            while len(self._index) > self.max_entries:
+                oldest, _ = self._index.popitem(last=False)
+                self._db.execute("DELETE FROM processed_tickets WHERE sys_id = ?", (oldest,))
+                self.evictions += 1
+            self._db.commit()
+
+    def discard(self, sys_id):
+        """Forget a ticket so it is processed again"""
+        with self._lock:
+            self._remove(sys_id)
+
+    def _remove(self, sys_id):
+        self._index.pop(sys_id, None)
+        self._db.execute("DELETE FROM processed_tickets WHERE sys_id = ?", (sys_id,))
+        self._db.commit()
+
+    def stats(self):
+        return {
+            "entries": len(self._index),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+        }
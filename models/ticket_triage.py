@@ -0,0 +1,174 @@
+"""Ticket Triage - label tickets cheaply and send only the hard ones to the big model"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from models.metrics import summarize
+
+
+class TicketTriage:
+    """Two-tier triage in front of ticket analysis.
+
+    1. Rules: a keyword classifier labels the ticket type. Urgent tickets and
+       tickets with complexity markers (outage, multiple sites, ...) escalate
+       straight away; confident matches on a simple type need no triage
+       model call.
+    2. Small model: anything the rules can't place is classified by the
+       provider's small model, which returns a type, complexity and confidence.
+    Simple, confidently labelled tickets (from either tier) are then analyzed
+    by the small model; complex or ambiguous ones escalate to the full
+    analysis model.
+    """
+
+    CATEGORIES = {
+        "access": ["password", "account locked", "locked out", "unlock", "access request", "mfa", "login"],
+        "interface": ["interface down", "port down", "link down", "flapping", "err-disabled", "crc errors"],
+        "vlan": ["vlan", "trunk", "native vlan", "access port"],
+        "wireless": ["wifi", "wi-fi", "wireless", "ssid", "access point"],
+        "connectivity": ["cannot connect", "can't connect", "no network", "no internet", "dns", "dhcp", "ping"],
+        "hardware": ["power supply", "fan failure", "hardware", "replace", "rma"],
+        "routing": ["bgp", "ospf", "eigrp", "route", "routing"],
+    }
+    SIMPLE_CATEGORIES = {"access", "interface", "vlan", "wireless"}
+    COMPLEXITY_MARKERS = [
+        "outage", "multiple sites", "all users", "entire", "intermittent", "core", "data center",
+        "security", "breach", "spanning tree", "loop", "degraded", "since the change"
+    ]
+
+    TRIAGE_PROMPT = """Classify this network operations ticket. Reply with JSON only:
+{{"category": one of {categories} or "other",
+ "complexity": "simple" or "complex",
+ "confidence": number between 0 and 1}}
+
+"simple" means a routine, well-known fix a junior engineer could follow from a runbook.
+
+Ticket:
+{ticket}"""
+
+    def __init__(self, confidence_threshold=None):
+        self.enabled = os.getenv("TRIAGE_ENABLED", "true").lower() == "true"
+        self.confidence_threshold = confidence_threshold or float(os.getenv("TRIAGE_CONFIDENCE", "0.7"))
+        self._lock = threading.Lock()
+        self._counters = {"by_rules": 0, "by_model": 0, "escalated": 0, "small": 0, "large": 0}
+        self._latencies = {tier: deque(maxlen=500) for tier in ("triage_small", "small", "large")}
+        # Whole words only - "core" mustn't match "score", nor "ping" "mapping"
+        self._category_patterns = {
+            category: [self._word(keyword) for keyword in keywords]
+            for category, keywords in self.CATEGORIES.items()
+        }
+        self._complexity_patterns = [self._word(marker) for marker in self.COMPLEXITY_MARKERS]
+
+    @staticmethod
+    def _word(phrase):
+        return re.compile(r'\b' + re.escape(phrase) + r'\b')
+
+    @staticmethod
+    def _urgent(ticket):
+        """P1/P2 - priority may be '2' or a display value like '2 - High'"""
+        match = re.match(r'\s*(\d)', str(ticket.get('priority', '')))
+        return match is not None and match.group(1) in ("1", "2")
+
+    def classify_rules(self, ticket):
+        """Keyword classification - {category, complex, confidence}"""
+        text = f"{ticket.get('short_description', '')} {ticket.get('description', '')}".lower()
+        scores = {
+            category: sum(1 for pattern in patterns if pattern.search(text))
+            for category, patterns in self._category_patterns.items()
+        }
+        matched = {category: score for category, score in scores.items() if score}
+        complex_ticket = self._urgent(ticket) or any(pattern.search(text) for pattern in self._complexity_patterns)
+        if not matched:
+            return {"category": "other", "complex": complex_ticket, "confidence": 0.0}
+
+        category = max(matched, key=matched.get)
+        # One clear category is a confident label; hits across several categories aren't
+        confidence = min(1.0, 0.5 + 0.2 * matched[category]) * (matched[category] / sum(matched.values()))
+        return {"category": category, "complex": complex_ticket, "confidence": round(confidence, 2)}
+
+    async def classify_llm(self, ticket_text, llm_service):
+        """Small-model classification - {category, complex, confidence}, or None if unusable"""
+        started = time.monotonic()
+        try:
+            reply = await llm_service.analyze(
+                self.TRIAGE_PROMPT.format(categories=sorted(self.CATEGORIES), ticket=ticket_text),
+                model="small"
+            )
+        except Exception as e:
+            print(f"⚠️  Triage model failed: {e}", flush=True)
+            return None
+        finally:
+            self._record("triage_small", time.monotonic() - started)
+
+        match = re.search(r'\{.*\}', reply or "", re.DOTALL)
+        try:
+            label = json.loads(match.group(0)) if match else None
+            return {
+                "category": str(label.get("category", "other")),
+                "complex": label.get("complexity") != "simple",
+                "confidence": float(label.get("confidence", 0))
+            }
+        except (AttributeError, TypeError, ValueError):
+            print(f"⚠️  Unparseable triage reply: {reply!r:.200}", flush=True)
+            return None
+
+    async def triage(self, ticket, ticket_text, llm_service):
+        """Label a ticket and decide the analysis tier - adds "tier": "small" or "large" """
+        label = self.classify_rules(ticket)
+        source = "rules"
+        confident = label["confidence"] >= self.confidence_threshold
+        if not label["complex"] and not (confident and label["category"] in self.SIMPLE_CATEGORIES):
+            llm_label = await self.classify_llm(ticket_text, llm_service)
+            if llm_label is not None:
+                label, source = llm_label, "small"
+                confident = label["confidence"] >= self.confidence_threshold
+
+        escalate = label["complex"] or not confident
+        with self._lock:
+            self._counters["by_rules" if source == "rules" else "by_model"] += 1
+            if escalate:
+                self._counters["escalated"] += 1
+        tier = "large" if escalate else "small"
+        print(f"🏷️  Triage ({source}): {label['category']}, "
+              f"{'complex' if label['complex'] else 'simple'}, confidence {label['confidence']:.2f} -> {tier} model",
+              flush=True)
+        return {**label, "source": source, "tier": tier}
+
+    def _record(self, tier, latency):
+        with self._lock:
+            self._latencies[tier].append(latency)
+
+    async def analyze(self, tier, prompt, llm_service):
+        """Run the analysis on the chosen tier's model, timing it; a failed small run escalates"""
+        started = time.monotonic()
+        try:
+            result = await llm_service.analyze(prompt, model="small" if tier == "small" else None)
+        except Exception as e:
+            if tier != "small":
+                raise
+            print(f"⚠️  Small-model analysis failed, escalating: {e}", flush=True)
+            result = None
+        finally:
+            self._record(tier, time.monotonic() - started)
+
+        if tier == "small" and not result:
+            with self._lock:
+                self._counters["escalated"] += 1
+            return await self.analyze("large", prompt, llm_service)
+        with self._lock:
+            self._counters[tier] += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            analyzed = self._counters["small"] + self._counters["large"]
+            return {
+                "enabled": self.enabled,
+                "confidence_threshold": self.confidence_threshold,
+                "classified": {"rules": self._counters["by_rules"], "small_model": self._counters["by_model"]},
+                "escalated": self._counters["escalated"],
+                "analyzed": {"small": self._counters["small"], "large": self._counters["large"]},
+                "small_share": round(self._counters["small"] / analyzed, 3) if analyzed else None,
+                "latency": {tier: summarize(values) for tier, values in self._latencies.items()}
+            }
@@ -0,0 +1,117 @@
+"""Ticket Workers - bounded-concurrency processing for the autonomous agent"""
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+from models.metrics import summarize
+from models.ticket_queue import QueuedTicket, TicketPriorityQueue
+
+
+class TicketWorkerPool:
+    """Runs a ticket handler on up to max_in_flight tickets at once.
+
+    A ticket is accepted only if it is not already queued or being processed,
+    so each ticket has at most one handler running and its work-note writes
+    happen in order. Handlers that exceed ticket_timeout are cancelled.
+    Waiting tickets are served by priority and SLA (see TicketPriorityQueue).
+    """
+
+    def __init__(self, handler, max_in_flight=None, ticket_timeout=None, on_done=None):
+        self.handler = handler  # async (ticket) -> True / False / None (deferred)
+        self.on_done = on_done  # (ticket, outcome) -> None
+        self.max_in_flight = max_in_flight or int(os.getenv("SERVICENOW_MAX_IN_FLIGHT", "4"))
+        self.ticket_timeout = ticket_timeout or float(os.getenv("SERVICENOW_TICKET_TIMEOUT", "300"))
+
+        self._queue = TicketPriorityQueue()
+        self._workers = []
+        self._queued = set()
+        self._in_flight = set()
+        self._accepting = True
+        self._time_to_analysis = defaultdict(lambda: deque(maxlen=200))
+        self._counters = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "deferred": 0,
+        }
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        for i in range(self.max_in_flight):
+            self._workers.append(asyncio.create_task(self._worker(), name=f"ticket-worker-{i}"))
+        print(f"✓ Ticket worker pool started ({self.max_in_flight} in flight max)", flush=True)
+
+    def submit(self, ticket, priority=5, created_at=None):
+        """Queue a ticket - returns False if it is already queued or in flight"""
+        sys_id = ticket.get('sys_id')
+        if not self._accepting or not sys_id:
+            return False
+        if sys_id in self._queued or sys_id in self._in_flight:
+            return False
+
+        self._queued.add(sys_id)
+        self._queue.put_nowait(QueuedTicket(ticket, priority, created_at))
+        self._counters["submitted"] += 1
+        return True
+
+    def is_busy(self, sys_id):
+        return sys_id in self._queued or sys_id in self._in_flight
+
+    async def _worker(self):
+        while True:
+            entry = await self._queue.get()
+            ticket = entry.ticket
+            sys_id = ticket.get('sys_id')
+            self._time_to_analysis[entry.priority].append(time.time() - entry.created_at)
+            self._queued.discard(sys_id)
+            self._in_flight.add(sys_id)
+            outcome = False
+
+            try:
+                outcome = await asyncio.wait_for(self.handler(ticket), self.ticket_timeout)
+            except asyncio.TimeoutError:
+                self._counters["timed_out"] += 1
+                print(f"✗ Ticket {ticket.get('number')} timed out after {self.ticket_timeout}s", flush=True)
+            except Exception as e:
+                print(f"✗ Ticket {ticket.get('number')} failed: {e}", flush=True)
+            finally:
+                self._in_flight.discard(sys_id)
+                if outcome is None:
+                    self._counters["deferred"] += 1
+                else:
+                    outcome = bool(outcome)
+                    self._counters["succeeded" if outcome else "failed"] += 1
+                if self.on_done:
+                    self.on_done(ticket, outcome)
+                self._queue.task_done()
+
+    async def drain(self, timeout=None):
+        """Wait until every queued ticket has been processed"""
+        await asyncio.wait_for(self._queue.join(), timeout)
+
+    async def shutdown(self, drain_timeout=None):
+        """Stop accepting tickets, let in-flight work finish, then stop the workers"""
+        self._accepting = False
+        drain_timeout = drain_timeout or float(os.getenv("SERVICENOW_DRAIN_TIMEOUT", "30"))
+        try:
+            await self.drain(drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Worker pool drain timed out with {len(self._in_flight)} in flight", flush=True)
+        finally:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+
+    def stats(self):
+        return {
+            "max_in_flight": self.max_in_flight,
+            "queued": len(self._queued),
+            "in_flight": len(self._in_flight),
+            **self._counters,
+            "time_to_first_analysis": {
+                f"P{priority}": summarize(samples)
+                for priority, samples in sorted(self._time_to_analysis.items())
+            }
+        }
@@ -0,0 +1,46 @@
+"""Token Counter - approximate LLM token counts for prompt budgeting"""
+import os
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """Shared tiktoken encoding, or None when tiktoken (or its BPE file) is unavailable"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding(os.getenv("TOKEN_COUNTER_ENCODING", "cl100k_base"))
+        except Exception as e:
+            _encoding_failed = True
+            print(f"⚠️  tiktoken encoding unavailable, estimating tokens: {e}", flush=True)
+    return _encoding
+
+
+def count_tokens(text):
+    """Token count of text - exact for OpenAI models, a close estimate for Claude"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, marker="\n[...truncated]"):
+    """Cut text down to at most max_tokens, marking the cut"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - count_tokens(marker))
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:budget * 4] + marker
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:budget]) + marker
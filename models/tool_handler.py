@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class AbstractToolHandler(ABC):
@@ -39,6 +40,14 @@ class ServiceNowHandler(AbstractToolHandler, tool_pattern= 'servicenow'):
         elif function_name == 'list_open_tickets':
             print(f"✅ Matched list_open_tickets condition", flush=True)
             return await self.servicenow.list_open_tickets()
+        
+        elif function_name == 'get_ticket_stats':
+            return await self.servicenow.ticket_stats(
+                group_by=arguments.get('group_by'),
+                priority=arguments.get('priority'),
+                state=arguments.get('state'),
+                include_closed=arguments.get('include_closed', False)
+            )
             
         else:
             print(f"❌ No condition matched for: '{function_name}'", flush=True)
@@ -66,7 +75,8 @@ class DocumentationHandler(AbstractToolHandler, tool_pattern= 'search'):
     async def handle(self, function_name, arguments):
         if function_name == 'search_documentation':
             query = arguments.get('query')
-            return self._search_documentation(query)
+            # Embedding + search block - keep them off the loop so other tools run meanwhile
+            return await asyncio.to_thread(self._search_documentation, query)
     
 
     def _search_documentation(self, query):
@@ -1,5 +1,6 @@
 import threading
 import asyncio
+from models.llm_services import close_loop_clients
 
 class WebhookHandler:
     """Handles incoming webhooks from OpenAI"""
@@ -18,10 +19,17 @@ class WebhookHandler:
             if self.call_acceptor.accept(call_id):
                 # Start monitoring in background thread
                 threading.Thread(
-                    target=lambda: asyncio.run(self.call_monitor.monitor(call_id)),
+                    target=lambda: asyncio.run(self._monitor(call_id)),
                     daemon=True
                 ).start()
             
             return True
         
-        return False
\ No newline at end of file
+        return False
+    
+    async def _monitor(self, call_id):
+        """Monitor a call on its own loop, then release that loop's LLM clients"""
+        try:
+            await self.call_monitor.monitor(call_id)
+        finally:
+            await close_loop_clients()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Watermark - persisted high-water mark for incremental ServiceNow polling"""
+import json
+import os
+
+
+class Watermark:
+    """Tracks the newest timestamp the agent has fully handled.
+
+    Tickets seen by a poll are observed; the mark only advances past a ticket
+    once it is completed, so a ticket that failed processing is fetched again
+    by the next poll instead of being skipped.
+    """
+
+    def __init__(self, path, field="sys_updated_on"):
+        self.path = path
+        self.field = field
+        self.value = None
+        self._pending = {}
+        self._max_seen = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('field') == self.field:
+                self.value = data.get('value')
+                print(f"✓ Resuming ticket polling from {self.field} >= {self.value}", flush=True)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read watermark {self.path}: {e}", flush=True)
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"field": self.field, "value": self.value}, f)
+        os.replace(tmp_path, self.path)
+
+    def observe(self, key, timestamp):
+        """Note a ticket returned by a poll (ServiceNow times sort lexically)"""
+        if not timestamp:
+            return
+        self._pending[key] = timestamp
+        if self._max_seen is None or timestamp > self._max_seen:
+            self._max_seen = timestamp
+
+    def complete(self, key):
+        """Mark an observed ticket as handled"""
+        self._pending.pop(key, None)
+
+    def retain(self, keys):
+        """Forget pending tickets a successful poll no longer returns (handled elsewhere)"""
+        keys = set(keys)
+        for key in [k for k in self._pending if k not in keys]:
+            del self._pending[key]
+
+    def commit(self):
+        """Advance and persist the mark up to the oldest still-pending ticket"""
+        candidate = min(self._pending.values()) if self._pending else self._max_seen
+        if candidate and (self.value is None or candidate > self.value):
+            self.value = candidate
+            try:
+                self._save()
+            except OSError as e:
+                print(f"⚠️  Could not persist watermark {self.path}: {e}", flush=True)
+        return self.value
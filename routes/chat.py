@@ -1,12 +1,28 @@
 """Chat API routes"""
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, Response, request, jsonify, render_template
 import asyncio
+import json
+import threading
 
 chat_bp = Blueprint('chat', __name__)
 
 # Global chat agent instance
 _chat_agent = None
 
+# One long-lived loop for all chat requests, so LLM clients and their
+# keep-alive connections are reused instead of created per request
+_chat_loop = None
+_chat_loop_lock = threading.Lock()
+
+def _run(coro):
+    """Run a coroutine on the shared chat loop and wait for its result"""
+    global _chat_loop
+    with _chat_loop_lock:
+        if _chat_loop is None:
+            _chat_loop = asyncio.new_event_loop()
+            threading.Thread(target=_chat_loop.run_forever, name="chat-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _chat_loop).result()
+
 def init_chat_routes(chat_agent):
     """Initialize routes with chat agent instance"""
     global _chat_agent
@@ -30,12 +46,7 @@ def chat():
             return jsonify({"error": "No message provided"}), 400
         
         # Call chat agent (async)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
-            _chat_agent.chat(message, conversation_history)
-        )
-        loop.close()
+        result = _run(_chat_agent.chat(message, conversation_history))
         
         return jsonify(result)
         
@@ -45,6 +56,40 @@ def chat():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@chat_bp.route("/api/chat/stream", methods=['POST'])
+def chat_stream():
+    """Chat endpoint - streams the answer as Server-Sent Events"""
+    data = request.json or {}
+    message = data.get('message')
+    conversation_history = data.get('conversation_history', [])
+    
+    if not message:
+        return jsonify({"error": "No message provided"}), 400
+    
+    def generate():
+        # Drive the async event stream on the shared chat loop
+        events = _chat_agent.chat_stream(message, conversation_history)
+        try:
+            while True:
+                try:
+                    event = _run(events.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}", flush=True)
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        finally:
+            # Client disconnects land here too - close the upstream LLM stream
+            _run(events.aclose())
+    
+    return Response(generate(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+
+@chat_bp.route("/api/chat/stats", methods=['GET'])
+def chat_stats():
+    """Claude token usage, including prompt cache reads/writes"""
+    return jsonify(_chat_agent.stats())
+
 @chat_bp.route("/api/chat/health", methods=['GET'])
 def health():
     """Health check"""
@@ -0,0 +1,47 @@
+"""ServiceNow integration routes"""
+import hmac
+from flask import Blueprint, jsonify, request
+
+servicenow_bp = Blueprint('servicenow', __name__)
+
+_servicenow = None
+
+def init_servicenow_routes(servicenow):
+    """Initialize routes with ServiceNow service"""
+    global _servicenow
+    _servicenow = servicenow
+    print("✓ ServiceNow routes initialized", flush=True)
+
+@servicenow_bp.route("/servicenow/stats", methods=['GET'])
+def servicenow_stats():
+    """ServiceNow transport and agent loop stats"""
+    return jsonify(_servicenow.stats())
+
+@servicenow_bp.route("/servicenow/events", methods=['POST'])
+def servicenow_events():
+    """Receive incident insert/update notifications from a ServiceNow business rule"""
+    secret = _servicenow.webhook_secret
+    if not secret:
+        return jsonify({"status": "error", "message": "ServiceNow webhook is not enabled"}), 404
+    
+    provided = request.headers.get('X-ServiceNow-Secret', '')
+    if not hmac.compare_digest(provided.encode(), secret.encode()):
+        print("✗ Rejected ServiceNow event with a bad secret", flush=True)
+        return jsonify({"status": "error", "message": "Invalid secret"}), 401
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        # A single incident, or {"incidents": [...]} / {"records": [...]} batches (possibly empty)
+        key = next((k for k in ('incidents', 'records') if k in data), None)
+        events = (data[key] or []) if key else [data]
+    elif isinstance(data, list):
+        events = data
+    else:
+        return jsonify({"status": "error", "message": "Expected a JSON incident payload"}), 400
+    
+    events = [e for e in events if isinstance(e, dict)]
+    accepted = sum(1 for event in events if _servicenow.push_event(event))
+    if events and not accepted:
+        return jsonify({"status": "error", "message": "Autonomous agent is not running"}), 503
+    
+    return jsonify({"status": "accepted", "accepted": accepted}), 202
@@ -29,8 +29,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def parse_args():
-    """Parse command-line arguments."""
+def parse_args(argv=None):
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Argument list to parse. Defaults to sys.argv[1:]; embedders pass []
+            to build the configuration purely from environment variables.
+    """
     parser = argparse.ArgumentParser(description="ServiceNow MCP Server")
 
     # Server configuration
@@ -113,7 +119,7 @@ def parse_args():
         default=os.environ.get("SCRIPT_EXECUTION_API_RESOURCE_PATH"),
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def create_config(args) -> ServerConfig:
@@ -41,7 +41,9 @@ from servicenow_mcp.tools.changeset_tools import (
 )
 from servicenow_mcp.tools.incident_tools import (
     add_comment,
+    close_incident,
     create_incident,
+    get_incident_stats,
     list_incidents,
     resolve_incident,
     update_incident,
@@ -122,7 +124,9 @@ __all__ = [
     "update_incident",
     "add_comment",
     "resolve_incident",
+    "close_incident",
     "list_incidents",
+    "get_incident_stats",
     "get_incident_by_number",
     
     # Catalog tools
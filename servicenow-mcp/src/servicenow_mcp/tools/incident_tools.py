@@ -66,6 +66,15 @@ class ResolveIncidentParams(BaseModel):
     resolution_notes: str = Field(..., description="Resolution notes for the incident")
 
 
+class CloseIncidentParams(BaseModel):
+    """Parameters for closing an incident (resolve and close in one call)."""
+
+    incident_id: str = Field(..., description="Incident ID or sys_id")
+    close_code: str = Field(..., description="Close code for the incident")
+    close_notes: str = Field(..., description="Resolution notes for the incident")
+    work_notes: Optional[str] = Field(None, description="Work notes to add while resolving")
+
+
 class ListIncidentsParams(BaseModel):
     """Parameters for listing incidents."""
     
@@ -76,6 +85,39 @@ class ListIncidentsParams(BaseModel):
     assignment_group: Optional[str] = Field(None, description="Filter by assignment group")
     category: Optional[str] = Field(None, description="Filter by category")
     query: Optional[str] = Field(None, description="Search query for incidents")
+    created_after: Optional[str] = Field(
+        None, description="Only incidents created at or after this UTC time (YYYY-MM-DD HH:MM:SS)"
+    )
+    updated_after: Optional[str] = Field(
+        None, description="Only incidents updated at or after this UTC time (YYYY-MM-DD HH:MM:SS)"
+    )
+    order_by: Optional[str] = Field(None, description="Field to sort results by, ascending")
+    display_value: bool = Field(
+        True, description="Return display values instead of raw values (raw times are UTC)"
+    )
+    active: Optional[bool] = Field(None, description="Filter by whether the incident is active (open)")
+    fields: Optional[List[str]] = Field(
+        None, description="Only return these incident fields (e.g. number, short_description)"
+    )
+
+
+class GetIncidentStatsParams(BaseModel):
+    """Parameters for aggregating incident counts."""
+
+    group_by: Optional[List[str]] = Field(
+        None, description="Fields to group counts by (e.g. state, priority, category)"
+    )
+    state: Optional[str] = Field(None, description="Filter by incident state")
+    priority: Optional[str] = Field(None, description="Filter by priority")
+    assignment_group: Optional[str] = Field(None, description="Filter by assignment group")
+    active: Optional[bool] = Field(None, description="Filter by whether the incident is active (open)")
+    created_after: Optional[str] = Field(
+        None, description="Only incidents created at or after this UTC time (YYYY-MM-DD HH:MM:SS)"
+    )
+    query: Optional[str] = Field(None, description="Additional encoded query to filter by")
+    display_value: bool = Field(
+        True, description="Label groups with display values (e.g. '1 - Critical') instead of raw values"
+    )
 
 
 class GetIncidentByNumberParams(BaseModel):
@@ -457,6 +499,117 @@ def resolve_incident(
         )
 
 
+def close_incident(
+    config: ServerConfig,
+    auth_manager: AuthManager,
+    params: CloseIncidentParams,
+) -> IncidentResponse:
+    """
+    Resolve an incident and then close it in ServiceNow.
+
+    Performs the Resolved (6) and Closed (7) state transitions back to back, so
+    clients need a single tool call instead of two updates.
+
+    Args:
+        config: Server configuration.
+        auth_manager: Authentication manager.
+        params: Parameters for closing the incident.
+
+    Returns:
+        Response with the result of the operation.
+    """
+    # Determine if incident_id is a number or sys_id
+    incident_id = params.incident_id
+    if len(incident_id) == 32 and all(c in "0123456789abcdef" for c in incident_id):
+        # This is likely a sys_id
+        api_url = f"{config.api_url}/table/incident/{incident_id}"
+    else:
+        # This is likely an incident number
+        # First, we need to get the sys_id
+        try:
+            query_url = f"{config.api_url}/table/incident"
+            query_params = {
+                "sysparm_query": f"number={incident_id}",
+                "sysparm_limit": 1,
+            }
+
+            response = requests.get(
+                query_url,
+                params=query_params,
+                headers=auth_manager.get_headers(),
+                timeout=config.timeout,
+            )
+            response.raise_for_status()
+
+            result = response.json().get("result", [])
+            if not result:
+                return IncidentResponse(
+                    success=False,
+                    message=f"Incident not found: {incident_id}",
+                )
+
+            incident_id = result[0].get("sys_id")
+            api_url = f"{config.api_url}/table/incident/{incident_id}"
+
+        except requests.RequestException as e:
+            logger.error(f"Failed to find incident: {e}")
+            return IncidentResponse(
+                success=False,
+                message=f"Failed to find incident: {str(e)}",
+            )
+
+    # Step 1: resolve with the close code and notes
+    resolve_data = {
+        "state": "6",  # Resolved
+        "close_code": params.close_code,
+        "close_notes": params.close_notes,
+    }
+    if params.work_notes:
+        resolve_data["work_notes"] = params.work_notes
+
+    try:
+        response = requests.put(
+            api_url,
+            json=resolve_data,
+            headers=auth_manager.get_headers(),
+            timeout=config.timeout,
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.error(f"Failed to resolve incident: {e}")
+        return IncidentResponse(
+            success=False,
+            message=f"Failed to resolve incident: {str(e)}",
+        )
+
+    # Step 2: close
+    try:
+        response = requests.put(
+            api_url,
+            json={"state": "7"},  # Closed
+            headers=auth_manager.get_headers(),
+            timeout=config.timeout,
+        )
+        response.raise_for_status()
+
+        result = response.json().get("result", {})
+
+        return IncidentResponse(
+            success=True,
+            message="Incident closed successfully",
+            incident_id=result.get("sys_id"),
+            incident_number=result.get("number"),
+        )
+
+    except requests.RequestException as e:
+        logger.error(f"Failed to close incident: {e}")
+        return IncidentResponse(
+            success=False,
+            message=f"Incident resolved but could not be closed: {str(e)}",
+            incident_id=incident_id,
+        )
+
+
 def list_incidents(
     config: ServerConfig,
     auth_manager: AuthManager,
@@ -479,7 +632,7 @@ def list_incidents(
     query_params = {
         "sysparm_limit": params.limit,
         "sysparm_offset": params.offset,
-        "sysparm_display_value": "true",
+        "sysparm_display_value": "true" if params.display_value else "false",
         "sysparm_exclude_reference_link": "true",
     }
     
@@ -495,10 +648,21 @@ def list_incidents(
         filters.append(f"short_descriptionLIKE{params.query}^ORdescriptionLIKE{params.query}")
     if params.assignment_group:
         filters.append(f"assignment_group={params.assignment_group}")
+    if params.active is not None:
+        filters.append(f"active={'true' if params.active else 'false'}")
+    if params.created_after:
+        filters.append(f"sys_created_on>={params.created_after}")
+    if params.updated_after:
+        filters.append(f"sys_updated_on>={params.updated_after}")
+    if params.order_by:
+        filters.append(f"ORDERBY{params.order_by}")
     
     if filters:
         query_params["sysparm_query"] = "^".join(filters)
     
+    if params.fields:
+        query_params["sysparm_fields"] = ",".join(params.fields)
+    
     # Make request
     try:
         response = requests.get(
@@ -534,6 +698,9 @@ def list_incidents(
                 "work_notes": incident_data.get("work_notes"),
                 "comments": incident_data.get("comments"),
             }
+            if params.fields:
+                # Fields outside the projection are absent, not empty
+                incident = {key: value for key, value in incident.items() if value is not None}
             incidents.append(incident)
         
         return {
@@ -551,6 +718,100 @@ def list_incidents(
         }
 
 
+def get_incident_stats(
+    config: ServerConfig,
+    auth_manager: AuthManager,
+    params: GetIncidentStatsParams,
+) -> dict:
+    """
+    Count incidents in ServiceNow, optionally grouped by fields.
+
+    Uses the Aggregate (Stats) API, so ServiceNow does the counting and only
+    the totals are returned.
+
+    Args:
+        config: Server configuration.
+        auth_manager: Authentication manager.
+        params: Parameters for the aggregation.
+
+    Returns:
+        Dictionary with the total count and per-group counts.
+    """
+    api_url = f"{config.api_url}/stats/incident"
+
+    query_params = {
+        "sysparm_count": "true",
+        "sysparm_display_value": "true" if params.display_value else "false",
+    }
+    if params.group_by:
+        query_params["sysparm_group_by"] = ",".join(params.group_by)
+
+    # Add filters
+    filters = []
+    if params.state:
+        filters.append(f"state={params.state}")
+    if params.priority:
+        filters.append(f"priority={params.priority}")
+    if params.assignment_group:
+        filters.append(f"assignment_group={params.assignment_group}")
+    if params.active is not None:
+        filters.append(f"active={'true' if params.active else 'false'}")
+    if params.created_after:
+        filters.append(f"sys_created_on>={params.created_after}")
+    if params.query:
+        filters.append(params.query)
+
+    if filters:
+        query_params["sysparm_query"] = "^".join(filters)
+
+    # Make request
+    try:
+        response = requests.get(
+            api_url,
+            params=query_params,
+            headers=auth_manager.get_headers(),
+            timeout=config.timeout,
+        )
+        response.raise_for_status()
+
+        result = response.json().get("result", [])
+        if isinstance(result, dict):
+            # Ungrouped requests return a single stats object
+            result = [result]
+
+        groups = []
+        total = 0
+        for row in result:
+            count = int(row.get("stats", {}).get("count", 0))
+            total += count
+            group = {
+                field.get("field"): field.get("display_value") or field.get("value")
+                for field in row.get("groupby_fields", [])
+            }
+            if group:
+                group["count"] = count
+                groups.append(group)
+
+        groups.sort(key=lambda group: group["count"], reverse=True)
+
+        return {
+            "success": True,
+            "message": f"Counted {total} incidents",
+            "count": total,
+            "group_by": params.group_by or [],
+            "groups": groups,
+        }
+
+    except requests.RequestException as e:
+        logger.error(f"Failed to get incident stats: {e}")
+        return {
+            "success": False,
+            "message": f"Failed to get incident stats: {str(e)}",
+            "count": None,
+            "groups": [],
+        }
+
+
 def get_incident_by_number(
     config: ServerConfig,
     auth_manager: AuthManager,
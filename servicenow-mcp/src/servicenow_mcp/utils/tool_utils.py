@@ -118,15 +118,20 @@ from servicenow_mcp.tools.changeset_tools import (
 )
 from servicenow_mcp.tools.incident_tools import (
     AddCommentParams,
+    CloseIncidentParams,
     CreateIncidentParams,
     ListIncidentsParams,
     ResolveIncidentParams,
     UpdateIncidentParams,
     GetIncidentByNumberParams,
+    GetIncidentStatsParams,
 )
 from servicenow_mcp.tools.incident_tools import (
     add_comment as add_comment_tool,
 )
+from servicenow_mcp.tools.incident_tools import (
+    close_incident as close_incident_tool,
+)
 from servicenow_mcp.tools.incident_tools import (
     create_incident as create_incident_tool,
 )
@@ -142,6 +147,9 @@ from servicenow_mcp.tools.incident_tools import (
 from servicenow_mcp.tools.incident_tools import (
     get_incident_by_number as get_incident_by_number_tool,
 )
+from servicenow_mcp.tools.incident_tools import (
+    get_incident_stats as get_incident_stats_tool,
+)
 from servicenow_mcp.tools.knowledge_base import (
     CreateArticleParams,
     CreateKnowledgeBaseParams,
@@ -393,6 +401,13 @@ def get_tool_definitions(
             "Resolve an incident in ServiceNow",
             "str",
         ),
+        "close_incident": (
+            close_incident_tool,
+            CloseIncidentParams,
+            str,
+            "Resolve and close an incident in ServiceNow in one call",
+            "str",
+        ),
         "list_incidents": (
             list_incidents_tool,
             ListIncidentsParams,
@@ -407,6 +422,13 @@ def get_tool_definitions(
             "Incident details from ServiceNow",
             "json_dict"
         ),
+        "get_incident_stats": (
+            get_incident_stats_tool,
+            GetIncidentStatsParams,
+            str,  # Expects JSON string
+            "Count incidents in ServiceNow, optionally grouped by fields such as state or priority",
+            "json",  # Tool returns dict, needs JSON dump
+        ),
         # Catalog Tools
         "list_catalog_items": (
             list_catalog_items_tool,
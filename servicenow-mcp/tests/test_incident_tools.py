@@ -1,7 +1,16 @@
 
 import unittest
 from unittest.mock import MagicMock, patch
-from servicenow_mcp.tools.incident_tools import get_incident_by_number, GetIncidentByNumberParams
+from servicenow_mcp.tools.incident_tools import (
+    close_incident,
+    CloseIncidentParams,
+    get_incident_by_number,
+    get_incident_stats,
+    GetIncidentStatsParams,
+    GetIncidentByNumberParams,
+    list_incidents,
+    ListIncidentsParams,
+)
 from servicenow_mcp.utils.config import ServerConfig, AuthConfig, AuthType, BasicAuthConfig
 from servicenow_mcp.auth.auth_manager import AuthManager
 
@@ -74,5 +83,161 @@ class TestIncidentTools(unittest.TestCase):
         self.assertFalse(result["success"])
         self.assertEqual(result["message"], "Incident not found: INC9999999")
 
+    @patch('requests.get')
+    def test_list_incidents_since_watermark(self, mock_get):
+        config = ServerConfig(instance_url="https://dev12345.service-now.com", auth=self.auth_config)
+        auth_manager = MagicMock(spec=AuthManager)
+        auth_manager.get_headers.return_value = {"Authorization": "Bearer FAKE_TOKEN"}
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "result": [
+                {
+                    "sys_id": "12345",
+                    "number": "INC0010001",
+                    "state": "1",
+                    "priority": "2",
+                    "sys_created_on": "2025-06-25 10:00:00",
+                    "sys_updated_on": "2025-06-25 10:05:00"
+                }
+            ]
+        }
+        mock_get.return_value = mock_response
+
+        params = ListIncidentsParams(
+            state="1",
+            limit=50,
+            offset=100,
+            updated_after="2025-06-25 10:00:00",
+            order_by="sys_updated_on",
+            display_value=False,
+        )
+        result = list_incidents(config, auth_manager, params)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["incidents"][0]["updated_on"], "2025-06-25 10:05:00")
+
+        query_params = mock_get.call_args.kwargs["params"]
+        self.assertEqual(query_params["sysparm_display_value"], "false")
+        self.assertEqual(query_params["sysparm_limit"], 50)
+        self.assertEqual(query_params["sysparm_offset"], 100)
+        self.assertEqual(
+            query_params["sysparm_query"],
+            "state=1^sys_updated_on>=2025-06-25 10:00:00^ORDERBYsys_updated_on",
+        )
+
+    @patch('requests.get')
+    def test_list_incidents_projects_fields(self, mock_get):
+        config = ServerConfig(instance_url="https://dev12345.service-now.com", auth=self.auth_config)
+        auth_manager = MagicMock(spec=AuthManager)
+        auth_manager.get_headers.return_value = {"Authorization": "Bearer FAKE_TOKEN"}
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "result": [{"number": "INC0010001", "short_description": "", "priority": "2"}]
+        }
+        mock_get.return_value = mock_response
+
+        params = ListIncidentsParams(
+            active=True,
+            assignment_group="network",
+            fields=["number", "short_description", "priority"],
+        )
+        result = list_incidents(config, auth_manager, params)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(
+            result["incidents"][0],
+            {"number": "INC0010001", "short_description": "", "priority": "2"},
+        )
+
+        query_params = mock_get.call_args.kwargs["params"]
+        self.assertEqual(query_params["sysparm_fields"], "number,short_description,priority")
+        self.assertEqual(query_params["sysparm_query"], "assignment_group=network^active=true")
+
+    @patch('requests.get')
+    def test_get_incident_stats_grouped(self, mock_get):
+        config = ServerConfig(instance_url="https://dev12345.service-now.com", auth=self.auth_config)
+        auth_manager = MagicMock(spec=AuthManager)
+        auth_manager.get_headers.return_value = {"Authorization": "Bearer FAKE_TOKEN"}
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "result": [
+                {
+                    "stats": {"count": "2"},
+                    "groupby_fields": [{"field": "priority", "value": "1", "display_value": "1 - Critical"}],
+                },
+                {
+                    "stats": {"count": "7"},
+                    "groupby_fields": [{"field": "priority", "value": "3", "display_value": "3 - Moderate"}],
+                },
+            ]
+        }
+        mock_get.return_value = mock_response
+
+        params = GetIncidentStatsParams(group_by=["priority"], active=True)
+        result = get_incident_stats(config, auth_manager, params)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["count"], 9)
+        self.assertEqual(
+            result["groups"],
+            [{"priority": "3 - Moderate", "count": 7}, {"priority": "1 - Critical", "count": 2}],
+        )
+
+        self.assertEqual(mock_get.call_args.args[0], "https://dev12345.service-now.com/api/now/stats/incident")
+        query_params = mock_get.call_args.kwargs["params"]
+        self.assertEqual(query_params["sysparm_count"], "true")
+        self.assertEqual(query_params["sysparm_group_by"], "priority")
+        self.assertEqual(query_params["sysparm_query"], "active=true")
+
+    @patch('requests.get')
+    def test_get_incident_stats_ungrouped(self, mock_get):
+        config = ServerConfig(instance_url="https://dev12345.service-now.com", auth=self.auth_config)
+        auth_manager = MagicMock(spec=AuthManager)
+        auth_manager.get_headers.return_value = {"Authorization": "Bearer FAKE_TOKEN"}
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"result": {"stats": {"count": "12"}}}
+        mock_get.return_value = mock_response
+
+        result = get_incident_stats(config, auth_manager, GetIncidentStatsParams(state="1"))
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["count"], 12)
+        self.assertEqual(result["groups"], [])
+        self.assertNotIn("sysparm_group_by", mock_get.call_args.kwargs["params"])
+
+    @patch('requests.put')
+    def test_close_incident_resolves_then_closes(self, mock_put):
+        config = ServerConfig(instance_url="https://dev12345.service-now.com", auth=self.auth_config)
+        auth_manager = MagicMock(spec=AuthManager)
+        auth_manager.get_headers.return_value = {"Authorization": "Bearer FAKE_TOKEN"}
+
+        sys_id = "a" * 32
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"result": {"sys_id": sys_id, "number": "INC0010001"}}
+        mock_put.return_value = mock_response
+
+        params = CloseIncidentParams(
+            incident_id=sys_id,
+            close_code="Solved",
+            close_notes="Port re-enabled",
+            work_notes="Resolution: Port re-enabled",
+        )
+        result = close_incident(config, auth_manager, params)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.incident_number, "INC0010001")
+        self.assertEqual(mock_put.call_count, 2)
+
+        resolve_call, close_call = mock_put.call_args_list
+        self.assertEqual(resolve_call.args[0], f"https://dev12345.service-now.com/api/now/table/incident/{sys_id}")
+        self.assertEqual(resolve_call.kwargs["json"]["state"], "6")
+        self.assertEqual(resolve_call.kwargs["json"]["close_code"], "Solved")
+        self.assertEqual(resolve_call.kwargs["json"]["work_notes"], "Resolution: Port re-enabled")
+        self.assertEqual(close_call.kwargs["json"], {"state": "7"})
+
 if __name__ == '__main__':
     unittest.main()
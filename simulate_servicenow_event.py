@@ -0,0 +1,58 @@
+"""Post fake ServiceNow incident events to the agent's webhook for local testing
+
+Usage:
+    SERVICENOW_WEBHOOK_SECRET=dev python simulate_servicenow_event.py INC0010001
+    python simulate_servicenow_event.py --full --count 5 --url http://localhost:5000
+"""
+import argparse
+import os
+import time
+import uuid
+import requests
+from dotenv import load_dotenv
+
+
+def fake_incident(number, priority):
+    """A full incident record, as a business rule serializing current fields would send"""
+    return {
+        "sys_id": uuid.uuid4().hex,
+        "number": number,
+        "short_description": f"Simulated network issue {number}",
+        "description": "Users report intermittent packet loss on the core switch uplink.",
+        "state": "1",
+        "priority": str(priority),
+        "created_on": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+    }
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("numbers", nargs="*", help="Existing ticket numbers to notify about")
+    parser.add_argument("--url", default="http://localhost:5000", help="Agent base URL")
+    parser.add_argument("--secret", default=os.getenv("SERVICENOW_WEBHOOK_SECRET", ""))
+    parser.add_argument("--full", action="store_true", help="Send complete fake incidents instead of numbers only")
+    parser.add_argument("--count", type=int, default=1, help="Fake incidents to generate with --full")
+    parser.add_argument("--priority", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.full:
+        events = [fake_incident(f"INC9{int(time.time()) % 1000000:06d}{i}", args.priority) for i in range(args.count)]
+    elif args.numbers:
+        # Number-only events make the agent fetch the ticket from ServiceNow
+        events = [{"number": number} for number in args.numbers]
+    else:
+        parser.error("give ticket numbers or --full")
+
+    response = requests.post(
+        f"{args.url.rstrip('/')}/servicenow/events",
+        json={"incidents": events},
+        headers={"X-ServiceNow-Secret": args.secret},
+        timeout=10
+    )
+    print(f"{response.status_code}: {response.text}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,8 +33,8 @@ async function sendMessage() {
     const typingIndicator = addTypingIndicator();
     
     try {
-        // Send to API
-        const response = await fetch('/api/chat', {
+        // Send to API - the answer streams back as Server-Sent Events
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -45,21 +45,49 @@ async function sendMessage() {
             })
         });
         
-        const data = await response.json();
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.error || response.statusText);
+        }
         
-        // Remove typing indicator
-        typingIndicator.remove();
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let aiMessage = null;
         
-        if (data.error) {
-            addMessage(`Error: ${data.error}`, 'ai');
-        } else {
-            // Add AI response
-            addMessage(data.message, 'ai');
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
             
-            // Update conversation history
-            conversationHistory = data.conversation_history;
+            for (const raw of events) {
+                if (!raw.startsWith('data: ')) continue;
+                const event = JSON.parse(raw.slice(6));
+                
+                if (event.type === 'text') {
+                    // Replace the typing indicator with the message on the first token
+                    if (!aiMessage) {
+                        typingIndicator.remove();
+                        aiMessage = addMessage('', 'ai');
+                    }
+                    aiMessage.textContent += event.text;
+                    scrollToBottom();
+                } else if (event.type === 'tool' && aiMessage) {
+                    aiMessage.textContent += '\n';
+                } else if (event.type === 'done') {
+                    // Update conversation history
+                    conversationHistory = event.conversation_history;
+                } else if (event.type === 'error') {
+                    throw new Error(event.error);
+                }
+            }
         }
         
+        typingIndicator.remove();
+        
     } catch (error) {
         typingIndicator.remove();
         addMessage(`Error: ${error.message}`, 'ai');